@@ -7,13 +7,14 @@ from typing import List, Optional, Literal
 from fastapi import APIRouter, Body, Path, Depends, HTTPException, File, UploadFile, Form
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.core.script_file import Script_file
 from app.database.session import get_db_session
 from app.services.material_manager import MaterialManager
 from app.utils.media_analyzer import MediaAnalysisResult
 from app.utils.path_manager import path_manager
-from .sessions import get_script_file_from_session_id
+from .sessions import get_script_file_from_session_id, _locked_dump
 
 # ============================= Router & Manager Initialization ============================= #
 
@@ -83,8 +84,9 @@ async def upload_material_direct(
         
 
         # 将更新后的草稿文件内容保存回磁盘
+        # (线程中持会话锁执行: 多MB的JSON序列化+写盘不再阻塞事件循环)
         file_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(file_path)
+        await run_in_threadpool(_locked_dump, session_id, script_file, file_path)
 
         metadata_response = None
         if analysis_result:
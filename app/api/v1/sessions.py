@@ -1,14 +1,19 @@
 # 会话、轨道、片段、特效等核心操作API
+import asyncio
+import math
 import uuid
 import os
 import shutil
 import logging
+from functools import lru_cache, partial
 from typing import List, Literal, Optional, Dict
 from enum import Enum
 
 from fastapi import APIRouter, Body, Path, HTTPException, Depends
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.core.script_file import Script_file
 from app.core.track import Track_type
@@ -33,6 +38,16 @@ from app.utils.path_manager import path_manager
 from app.config import settings
 
 
+try:
+    import orjson  # noqa: F401
+    # orjson为可选加速依赖, 与script_file/media_analyzer的处理保持一致:
+    # 可用时响应走ORJSONResponse, 缺失时回退到标准JSONResponse
+    _FastJSONResponse = ORJSONResponse
+except ImportError:
+    _FastJSONResponse = JSONResponse
+
+logger = logging.getLogger(__name__)
+
 # ============================= Router ============================= #
 router = APIRouter()
 # ============================= 公共模型与工具函数 ============================= #
@@ -46,36 +61,183 @@ class TimerangeModel(BaseModel):
     start: int = Field(..., description="开始时间 (微秒)")
     duration: int = Field(..., description="持续时间 (微秒)")
 
+class FrozenRequest(BaseModel):
+    """热路径请求模型的公共基类
+
+    pydantic v2的Rust核心负责解析, frozen让实例不可变: 省去每个字段的
+    __set__校验开销, handler也可以放心把请求对象当只读数据传递。
+    """
+    model_config = ConfigDict(frozen=True)
+
+def _effect_response(segment_id: Optional[str] = None, message: str = "效果添加成功") -> JSONResponse:
+    """直接返回JSON响应, 跳过Pydantic响应模型的构造与二次序列化
+
+    response_model仅保留用于生成OpenAPI文档。
+    """
+    return _FastJSONResponse({"segment_id": segment_id, "message": message})
+
+def _find_seg(script_file: Script_file, segment_id: str, cls):
+    """查找指定ID且为指定类型的片段
+
+    三个find_*_in_session只在isinstance检查上不同, 统一为一个按类型
+    参数化的查找函数。查找走Script_file维护的segment_id索引,
+    O(1)而非遍历所有轨道的所有片段。
+    """
+    segment = script_file._segment_index.get(segment_id)
+    if segment is not None and isinstance(segment, cls):
+        return segment
+    return None
+
 def find_segment_in_session(script_file: Script_file, segment_id: str) -> Optional[Video_segment]:
     """在会话的所有轨道中查找指定ID的视频片段"""
-    for track in script_file.tracks.values():
-        for segment in track.segments:
-            # 确保只对视频片段操作
-            if segment.segment_id == segment_id and isinstance(segment, Video_segment):
-                return segment
-    return None
+    return _find_seg(script_file, segment_id, Video_segment)
 
 def find_audio_segment_in_session(script_file: Script_file, segment_id: str) -> Optional[Audio_segment]:
     """在会话的所有轨道中查找指定ID的音频片段"""
-    for track in script_file.tracks.values():
-        for segment in track.segments:
-            if segment.segment_id == segment_id and isinstance(segment, Audio_segment):
-                return segment
-    return None
+    return _find_seg(script_file, segment_id, Audio_segment)
 
 def find_text_segment_in_session(script_file: Script_file, segment_id: str) -> Optional[CoreTextSegment]:
     """在会话的所有轨道中查找指定ID的文本片段"""
-    for track in script_file.tracks.values():
-        for segment in track.segments:
-            if segment.segment_id == segment_id and isinstance(segment, CoreTextSegment):
-                return segment
-    return None
+    return _find_seg(script_file, segment_id, CoreTextSegment)
 
+@lru_cache(maxsize=1024)
 def hex_to_rgb_normalized(hex_color: str) -> tuple[float, float, float]:
-    """将 #RRGGBB 格式的颜色字符串转换为归一化的RGB元组"""
+    """将 #RRGGBB 格式的颜色字符串转换为归一化的RGB元组
+
+    颜色字符串高度重复(整条字幕轨道通常共用几种颜色), 缓存后变为一次字典查找。
+    返回值是不可变元组, 调用方共享同一实例是安全的。
+    """
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) / 255.0 for i in (0, 2, 4))
 
+# 【性能优化】动画/特效类别 -> 元数据枚举类的分发表, 取代各端点中的if/elif链
+_VIDEO_ANIM_ENUMS = {
+    "intro": Intro_type,
+    "outro": Outro_type,
+    "group": Group_animation_type,
+}
+_AUDIO_EFFECT_ENUMS = {
+    "sound_effect": Audio_scene_effect_type,
+    "tone": Tone_effect_type,
+    "speech_to_song": Speech_to_song_type,
+}
+_TEXT_ANIM_ENUMS = {
+    "intro": Text_intro,
+    "outro": Text_outro,
+    "loop": Text_loop_anim,
+}
+
+@lru_cache(maxsize=1024)
+def _resolve_enum_member(enum_cls, name: str):
+    """按名称解析元数据枚举成员并缓存结果
+
+    这些枚举有成百上千个成员, getattr要走枚举类的__getattr__慢路径,
+    缓存后同名效果的重复请求直接命中。未命中的名称会抛出AttributeError
+    (lru_cache不缓存异常), 由调用方转换为404。
+    """
+    return getattr(enum_cls, name)
+
+
+# ============================= 草稿写回调度 ============================= #
+# 每次微小编辑都同步重写整个draft_content.json, JSON序列化会主导请求延迟。
+# 这里为每个会话维护一个短暂的合并窗口: 窗口内的连续编辑只触发一次落盘,
+# 且落盘在线程中执行, 不阻塞事件循环。读取始终走内存中的Script_file实例,
+# 因此延迟写盘不影响后续请求的正确性。
+
+_DUMP_DEBOUNCE_SECONDS = 0.05
+# session_id -> (TimerHandle, Script_file)
+_pending_dumps: Dict[str, tuple] = {}
+# 主事件循环, 由依赖注入阶段记录, 供线程池中运行的同步端点调度落盘
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _locked_dump(session_id: str, script_file: Script_file,
+                 file_path: str, fsync: bool = False) -> None:
+    """持有会话编辑锁落盘, 必须在线程中调用
+
+    【关键修复】同一会话的落盘之间、落盘与编辑之间必须互斥:
+    并发执行序列化会重复重建texts素材, 两个线程同时写同一个.tmp
+    文件更会让os.replace发布出损坏的草稿; 编辑中途落盘则可能在
+    遍历tracks时遇到并发修改。
+    """
+    with script_file_manager.get_mutation_lock(session_id):
+        script_file.dump(file_path, fsync=fsync)
+
+def schedule_dump(session_id: str, script_file: Script_file) -> None:
+    """调度一次延迟落盘, 合并同一会话短时间内的多次写入
+
+    可以从事件循环或线程池中的同步端点调用。
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # 同步(def)端点在线程池中运行, 没有运行中的事件循环,
+        # 线程安全地切回依赖注入阶段记录的主循环
+        _event_loop.call_soon_threadsafe(
+            _schedule_dump_on_loop, _event_loop, session_id, script_file)
+        return
+    _schedule_dump_on_loop(loop, session_id, script_file)
+
+def _schedule_dump_on_loop(loop: asyncio.AbstractEventLoop,
+                           session_id: str, script_file: Script_file) -> None:
+    pending = _pending_dumps.pop(session_id, None)
+    if pending is not None:
+        pending[0].cancel()
+
+    def _flush():
+        _pending_dumps.pop(session_id, None)
+        task = loop.create_task(asyncio.to_thread(
+            _locked_dump, session_id, script_file, script_file._draft_path))
+        # 任务无人await, 必须挂回调取走异常, 否则落盘失败会无声无息
+        task.add_done_callback(partial(_on_flush_done, session_id))
+
+    _pending_dumps[session_id] = (
+        loop.call_later(_DUMP_DEBOUNCE_SECONDS, _flush),
+        script_file,
+    )
+
+def _on_flush_done(session_id: str, task: "asyncio.Task") -> None:
+    """延迟落盘任务的收尾回调: 失败时记录错误, 避免编辑静默丢失"""
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error("❌ 会话 %s 延迟落盘失败, 此次编辑未写入磁盘: %s",
+                     session_id, exc, exc_info=exc)
+
+def _cancel_pending_dump(session_id: str) -> None:
+    """取消某个会话待执行的延迟落盘 (调用方随后会自行同步落盘或删除目录)"""
+    pending = _pending_dumps.pop(session_id, None)
+    if pending is not None:
+        pending[0].cancel()
+
+async def flush_session_dump(session_id: str) -> None:
+    """立即落盘指定会话的待写草稿(若有), 供缓存重建前调用
+
+    【关键修复】实例被LRU淘汰时落盘可能仍在合并窗口内: 此时直接读
+    磁盘会拿到旧状态, 而待写任务稍后又会用已淘汰实例覆盖新文件,
+    两个实例就此分叉。重建前必须先把窗口内的状态冲刷到磁盘。
+    """
+    pending = _pending_dumps.pop(session_id, None)
+    if pending is None:
+        return
+    handle, script_file = pending
+    handle.cancel()
+    await asyncio.to_thread(
+        _locked_dump, session_id, script_file, script_file._draft_path)
+
+async def flush_pending_dumps() -> None:
+    """立即落盘所有待写会话, 供应用关闭钩子调用, 避免丢失合并窗口内的编辑"""
+    items = list(_pending_dumps.items())
+    _pending_dumps.clear()
+    for session_id, (handle, script_file) in items:
+        handle.cancel()
+        try:
+            await asyncio.to_thread(
+                _locked_dump, session_id, script_file, script_file._draft_path)
+        except Exception as e:
+            # 除磁盘错误外, 序列化本身也可能抛TypeError/RuntimeError
+            logger.error("❌ 关闭时落盘会话 %s 失败: %s", session_id, e)
+
 
 # ============================= 依赖注入 ============================= #
 
@@ -88,6 +250,10 @@ async def get_script_file_from_session_id(
     1. 验证 session_id 是否存在于数据库中。
     2. 使用 ScriptFileManager 获取或创建 Script_file 实例。
     """
+    global _event_loop
+    if _event_loop is None:
+        _event_loop = asyncio.get_running_loop()
+
     session_db_obj = await session_state_manager.get_session(db, session_id)
     if not session_db_obj:
         raise HTTPException(status_code=404, detail="会话不存在")
@@ -173,14 +339,14 @@ async def create_session(
         if os.path.exists(session_dir):
             # 如果目录已存在，先删除它
             shutil.rmtree(session_dir)
-            logging.info(f"🗑️ [SESSION CREATE] 清理已存在的会话目录: {session_dir}")
-        
+            logger.info("🗑️ [SESSION CREATE] 清理已存在的会话目录: %s", session_dir)
+
         # 复制模板到会话目录
         shutil.copytree(template_dir, session_dir)
-        logging.info(f"✅ [SESSION CREATE] 已成功将模板 '{template_dir}' 复制到 '{session_dir}'")
+        logger.info("✅ [SESSION CREATE] 已成功将模板 '%s' 复制到 '%s'", template_dir, session_dir)
     except OSError as e:
         # 如果复制失败，也应视为服务器内部错误
-        logging.error(f"❌ [SESSION CREATE] 无法创建会话目录或复制模板文件: {e}")
+        logger.error("❌ [SESSION CREATE] 无法创建会话目录或复制模板文件: %s", e)
         raise HTTPException(status_code=500, detail=f"服务器内部错误：无法创建会话目录或复制模板文件: {e}")
 
     return CreateSessionResponse(session_id=new_session.session_id)
@@ -199,10 +365,13 @@ async def update_session_action(
 ):
     if action.action_type == ActionType.SAVE_DRAFT:
         try:
-            # 1. 保存草稿文件
-            session_dir = path_manager.get_session_dir(session_id)
-            output_path = path_manager.get_draft_content_path(session_id)
-            script_file.dump(output_path)
+            # 1. 保存草稿文件 (先取消可能存在的延迟落盘, 这里会同步写全量,
+            # 并fsync确保导出边界上的数据真正落盘)
+            _cancel_pending_dump(session_id)
+            session_dir = script_file._session_dir
+            output_path = script_file._draft_path
+            await run_in_threadpool(_locked_dump, session_id, script_file,
+                                    output_path, fsync=True)
             
             # 2. 打包会话目录
             zip_filename = f"{session_id}.zip"
@@ -219,12 +388,16 @@ async def update_session_action(
             # 4. 构造 R2 公开访问 URL
             public_url = f"{settings.R2_PUBLIC_URL}/{zip_filename}"
             
-            # 5. 清理本地的 zip 文件和会话草稿目录
-            os.remove(zip_output_path)
-            shutil.rmtree(session_dir)
+            # 5. 并行清理本地的 zip 文件和会话草稿目录
+            # rmtree要删除大量小文件, 放到线程中与zip删除并发执行, 不阻塞事件循环
+            await asyncio.gather(
+                asyncio.to_thread(os.remove, zip_output_path),
+                asyncio.to_thread(shutil.rmtree, session_dir),
+            )
 
-            # 6. 打印成功日志
-            logging.info(f"打包成功，上传R2 成功，草稿文件已清理。R2 zip url为：{public_url}")
+            # 6. 打印成功日志 (级别被过滤时完全跳过字符串构造)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("打包成功，上传R2 成功，草稿文件已清理。R2 zip url为：%s", public_url)
 
             return UpdateSessionActionResponse(
                 status="success", 
@@ -233,7 +406,7 @@ async def update_session_action(
             )
         except Exception as e:
             # 记录详细错误日志
-            logging.error(f"❌ [SAVE & UPLOAD FAILED] Session: {session_id}, Error: {e}")
+            logger.error("❌ [SAVE & UPLOAD FAILED] Session: %s, Error: %s", session_id, e)
             # 失败后也尝试清理，避免垃圾文件残留
             if os.path.exists(zip_output_path):
                 os.remove(zip_output_path)
@@ -271,23 +444,28 @@ async def add_track(
     """
     try:
         core_track_type = Track_type.from_name(request.track_type)
-        
-        script_file.add_track(
-            track_type=core_track_type,
-            track_name=request.track_name,
-            mute=request.mute,
-            relative_index=request.relative_index,
-            absolute_index=request.absolute_index
-        )
-        
-        # 获取刚创建的轨道
-        track_name = request.track_name if request.track_name else core_track_type.name
-        new_track = script_file.tracks[track_name]
-        
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path) # 持久化
-        
+
+        # 【关键修复】修改+落盘在线程中持会话锁执行: 与线程池中的def端点
+        # 及延迟落盘互斥, 事件循环也不会卡在threading.Lock上
+        # (锁不可重入, 锁内直接调dump而非_locked_dump)
+        def _locked_add_track():
+            with script_file_manager.get_mutation_lock(session_id):
+                script_file.add_track(
+                    track_type=core_track_type,
+                    track_name=request.track_name,
+                    mute=request.mute,
+                    relative_index=request.relative_index,
+                    absolute_index=request.absolute_index
+                )
+
+                # 获取刚创建的轨道
+                track_name = request.track_name if request.track_name else core_track_type.name
+                track = script_file.tracks[track_name]
+                script_file.dump(script_file._draft_path)  # 持久化
+                return track
+
+        new_track = await run_in_threadpool(_locked_add_track)
+
         return {
             "track_id": new_track.track_id,
             "track_name": new_track.name,
@@ -430,12 +608,12 @@ async def add_segment(
                 raise HTTPException(status_code=404, detail=f"视频素材 '{request.material_id}' 不存在")
 
             cs = request.params.video.clip_settings
-            clip_settings = Clip_settings(
-                transform_x=cs.transform_x, transform_y=cs.transform_y, 
+            clip_settings = Clip_settings.DEFAULT if cs is None else Clip_settings(
+                transform_x=cs.transform_x, transform_y=cs.transform_y,
                 scale_x=cs.scale_x, scale_y=cs.scale_y,
                 alpha=cs.alpha, rotation=cs.rotation,
                 flip_horizontal=cs.flip_horizontal, flip_vertical=cs.flip_vertical
-            ) if cs else None
+            )
             
             segment = Video_segment(
                 material=video_material,
@@ -475,30 +653,53 @@ async def add_segment(
                 except AttributeError:
                     raise HTTPException(status_code=404, detail=f"字体 '{text_params.style.font_id}' 不存在")
             
-            # 2. 文本样式
+            # 2. 文本样式 (直接读取属性, 避免model_dump逐字段遍历的开销)
             text_style_instance = None
             if text_params.style:
-                style_args = text_params.style.model_dump(exclude_none=True, exclude={'font_id'})
-                if 'color' in style_args and style_args['color']:
-                    style_args['color'] = hex_to_rgb_normalized(style_args['color'])
+                st = text_params.style
+                style_args = {}
+                if st.size is not None: style_args['size'] = st.size
+                if st.bold is not None: style_args['bold'] = st.bold
+                if st.italic is not None: style_args['italic'] = st.italic
+                if st.underline is not None: style_args['underline'] = st.underline
+                if st.color is not None: style_args['color'] = hex_to_rgb_normalized(st.color)
+                if st.alpha is not None: style_args['alpha'] = st.alpha
+                if st.align is not None: style_args['align'] = st.align
+                if st.vertical is not None: style_args['vertical'] = st.vertical
+                if st.letter_spacing is not None: style_args['letter_spacing'] = st.letter_spacing
+                if st.line_spacing is not None: style_args['line_spacing'] = st.line_spacing
                 text_style_instance = Text_style(**style_args)
 
             # 3. 描边
             border_instance = None
             if text_params.border:
-                border_args = text_params.border.model_dump()
-                border_args['color'] = hex_to_rgb_normalized(border_args['color'])
-                border_instance = Text_border(**border_args)
+                b = text_params.border
+                border_instance = Text_border(
+                    width=b.width,
+                    color=hex_to_rgb_normalized(b.color),
+                    alpha=b.alpha
+                )
 
             # 4. 背景
             background_instance = None
             if text_params.background:
-                background_instance = Text_background(**text_params.background.model_dump())
-            
+                bg = text_params.background
+                background_instance = Text_background(
+                    color=bg.color, style=bg.style, alpha=bg.alpha,
+                    round_radius=bg.round_radius, height=bg.height, width=bg.width,
+                    horizontal_offset=bg.horizontal_offset, vertical_offset=bg.vertical_offset
+                )
+
             # 5. 图像设置
             clip_settings_instance = None
             if text_params.clip_settings:
-                clip_settings_instance = Clip_settings(**text_params.clip_settings.model_dump())
+                tcs = text_params.clip_settings
+                clip_settings_instance = Clip_settings(
+                    alpha=tcs.alpha, rotation=tcs.rotation,
+                    flip_horizontal=tcs.flip_horizontal, flip_vertical=tcs.flip_vertical,
+                    transform_x=tcs.transform_x, transform_y=tcs.transform_y,
+                    scale_x=tcs.scale_x, scale_y=tcs.scale_y
+                )
 
             # --- 创建文本片段 ---
             segment = CoreTextSegment(
@@ -515,21 +716,23 @@ async def add_segment(
         else:
             raise HTTPException(status_code=400, detail=f"不支持的片段类型: {request.type}")
 
-        # 4. 将片段添加到轨道
-        if segment:
-            script_file.add_segment(segment, track.name)
-        
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path) # 持久化
-        
-        return AddSegmentResponse(
-            segment_id=segment.segment_id,
-            material_id=segment.material_id,
-            track_name=track.name,
-            start=segment.start,
-            end=segment.end
-        )
+        # 4. 将片段添加到轨道并落盘 (线程中持会话锁, 与其他编辑/落盘互斥)
+        def _locked_add_segment():
+            with script_file_manager.get_mutation_lock(session_id):
+                if segment:
+                    script_file.add_segment(segment, track.name)
+                script_file.dump(script_file._draft_path)  # 持久化
+
+        await run_in_threadpool(_locked_add_segment)
+
+        # 直接返回JSON响应, 跳过AddSegmentResponse的构造与二次校验
+        return _FastJSONResponse({
+            "segment_id": segment.segment_id,
+            "material_id": segment.material_id,
+            "track_name": track.name,
+            "start": segment.start,
+            "end": segment.end
+        })
     except (TypeError, ValueError) as e:
         # 捕获核心库可能抛出的类型或值错误
         raise HTTPException(status_code=400, detail=str(e))
@@ -554,16 +757,18 @@ async def add_track_effect(
         
         target_tr = Timerange(request.target_timerange.start, request.target_timerange.duration)
 
-        script_file.add_effect(
-            effect=effect_meta,
-            t_range=target_tr,
-            track_name=request.track_name,
-            params=request.params
-        )
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path)
-        return GeneralEffectResponse(message="独立特效添加成功")
+        def _locked_add_effect():
+            with script_file_manager.get_mutation_lock(session_id):
+                script_file.add_effect(
+                    effect=effect_meta,
+                    t_range=target_tr,
+                    track_name=request.track_name,
+                    params=request.params
+                )
+                script_file.dump(script_file._draft_path)
+
+        await run_in_threadpool(_locked_add_effect)
+        return _effect_response(message="独立特效添加成功")
     except AttributeError:
         raise HTTPException(
             status_code=404,
@@ -590,16 +795,18 @@ async def add_track_filter(
         filter_meta = getattr(Filter_type, request.filter_id)
         target_tr = Timerange(request.target_timerange.start, request.target_timerange.duration)
 
-        script_file.add_filter(
-            filter_meta=filter_meta,
-            t_range=target_tr,
-            track_name=request.track_name,
-            intensity=request.intensity
-        )
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path)
-        return GeneralEffectResponse(message="独立滤镜添加成功")
+        def _locked_add_filter():
+            with script_file_manager.get_mutation_lock(session_id):
+                script_file.add_filter(
+                    filter_meta=filter_meta,
+                    t_range=target_tr,
+                    track_name=request.track_name,
+                    intensity=request.intensity
+                )
+                script_file.dump(script_file._draft_path)
+
+        await run_in_threadpool(_locked_add_filter)
+        return _effect_response(message="独立滤镜添加成功")
     except AttributeError:
         raise HTTPException(status_code=404, detail=f"滤镜 '{request.filter_id}' 不存在")
     except (ValueError, TypeError, NameError) as e:
@@ -631,14 +838,14 @@ class AddBackgroundFillingRequest(BaseModel):
     blur: Optional[float] = Field(0.0625, description="模糊程度(当fill_type为blur时有效, 0-1)")
     color: Optional[str] = Field("#00000000", description="背景颜色(当fill_type为color时有效, 格式'#RRGGBBAA')")
 
-class AddVideoAnimationRequest(BaseModel):
+class AddVideoAnimationRequest(FrozenRequest):
     """添加视频动画的请求体"""
     segment_id: str = Field(..., description="视频片段ID")
     animation_type: Literal["intro", "outro", "group"] = Field(..., description="动画类型")
     animation_id: str = Field(..., description="动画ID (对应元数据枚举的名称)")
     duration: Optional[int] = Field(None, description="动画持续时间(微秒)，不提供则使用默认值")
 
-class AddVideoFilterRequest(BaseModel):
+class AddVideoFilterRequest(FrozenRequest):
     """为视频片段添加滤镜的请求体"""
     segment_id: str = Field(..., description="视频片段ID")
     filter_id: str = Field(..., description="滤镜ID (对应Filter_type元数据)")
@@ -664,12 +871,13 @@ async def add_video_effect(
         effect_enum = Video_scene_effect_type if request.type == "video_scene" else Video_character_effect_type
         effect_meta = getattr(effect_enum, request.effect_type_id)
         
-        segment.add_effect(effect_meta, request.params)
+        def _locked_apply_effect():
+            with script_file_manager.get_mutation_lock(session_id):
+                segment.add_effect(effect_meta, request.params)
+                script_file.dump(script_file._draft_path)  # 持久化
 
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path) # 持久化
-        return GeneralEffectResponse(segment_id=segment.segment_id)
+        await run_in_threadpool(_locked_apply_effect)
+        return _effect_response(segment_id=segment.segment_id)
     except AttributeError:
         raise HTTPException(
             status_code=404,
@@ -703,17 +911,18 @@ async def add_transition(
             detail=f"转场效果 '{request.transition_type_id}' 不存在"
         )
 
-    segment.add_transition(
-        transition_type=transition_meta,
-        duration=request.duration
-    )
-    
-    # 持久化修改到草稿文件
-    session_dir = path_manager.get_session_dir(session_id)
-    output_path = path_manager.get_draft_content_path(session_id)
-    script_file.dump(output_path)
+    def _locked_add_transition():
+        with script_file_manager.get_mutation_lock(session_id):
+            segment.add_transition(
+                transition_type=transition_meta,
+                duration=request.duration
+            )
+            # 持久化修改到草稿文件
+            script_file.dump(script_file._draft_path)
+
+    await run_in_threadpool(_locked_add_transition)
 
-    return GeneralEffectResponse(segment_id=request.segment_id)
+    return _effect_response(segment_id=request.segment_id)
 
 
 
@@ -733,31 +942,36 @@ async def add_background_filling(
         raise HTTPException(status_code=404, detail="片段未找到")
     
     try:
-        segment.add_background_filling(
-            fill_type=request.fill_type,
-            blur=request.blur,
-            color=request.color
-        )
-    
-        # 手动将背景填充添加到全局素材库
-        if segment.background_filling is not None:
-            script_file.materials.canvases.append(segment.background_filling)
-    
-        # 持久化修改到草稿文件
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path)
-    
-        return GeneralEffectResponse(segment_id=request.segment_id, message="背景填充添加成功")
+        def _locked_add_filling():
+            with script_file_manager.get_mutation_lock(session_id):
+                segment.add_background_filling(
+                    fill_type=request.fill_type,
+                    blur=request.blur,
+                    color=request.color
+                )
+
+                # 手动将背景填充添加到全局素材库
+                if segment.background_filling is not None:
+                    script_file.materials.canvases.append(segment.background_filling)
+
+                # 持久化修改到草稿文件
+                script_file.dump(script_file._draft_path)
+
+        await run_in_threadpool(_locked_add_filling)
+
+        return _effect_response(segment_id=request.segment_id, message="背景填充添加成功")
     except (ValueError, TypeError) as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# 【性能优化】以下只做纯内存修改的端点声明为普通def, 由FastAPI放入线程池执行,
+# 避免在事件循环上排队(会话锁也随之在工作线程中获取);
+# 含await的端点(如style_subtitles)保持async def
 @router.post(
     "/{session_id}/video/animation",
     response_model=GeneralEffectResponse,
     summary="添加视频动画"
 )
-async def add_video_animation(
+def add_video_animation(
     session_id: str = Path(..., description="会话ID"),
     request: AddVideoAnimationRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
@@ -768,27 +982,20 @@ async def add_video_animation(
         raise HTTPException(status_code=404, detail=f"ID为 '{request.segment_id}' 的视频片段不存在")
 
     try:
-        if request.animation_type == "intro":
-            animation_enum = Intro_type
-        elif request.animation_type == "outro":
-            animation_enum = Outro_type
-        elif request.animation_type == "group":
-            animation_enum = Group_animation_type
-        else:
-            # This case should not be reached due to Pydantic's Literal validation
-            raise HTTPException(status_code=400, detail="无效的动画类型")
+        # Pydantic的Literal校验保证animation_type一定在表中
+        animation_meta = _resolve_enum_member(
+            _VIDEO_ANIM_ENUMS[request.animation_type], request.animation_id)
 
-        animation_meta = getattr(animation_enum, request.animation_id)
-        segment.add_animation(animation_meta, duration=request.duration)
-        
-        # [最终修复 - 正确版]: 将新创建的动画素材注册到全局素材列表中
-        if segment.animations_instance and segment.animations_instance not in script_file.materials:
-            script_file.materials.animations.append(segment.animations_instance)
-
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path)
-        return GeneralEffectResponse(segment_id=request.segment_id, message="视频动画添加成功")
+        # 同一会话的"修改+调度落盘"需串行化, 防止并发编辑互相覆盖
+        with script_file_manager.get_mutation_lock(session_id):
+            segment.add_animation(animation_meta, duration=request.duration)
+
+            # [最终修复 - 正确版]: 将新创建的动画素材注册到全局素材列表中(O(1)去重)
+            if segment.animations_instance:
+                script_file.materials.add_unique("animations", segment.animations_instance)
+
+            schedule_dump(session_id, script_file)  # 延迟合并落盘
+        return _effect_response(segment_id=request.segment_id, message="视频动画添加成功")
     except AttributeError:
         raise HTTPException(
             status_code=404,
@@ -802,7 +1009,7 @@ async def add_video_animation(
     response_model=GeneralEffectResponse,
     summary="为视频片段添加滤镜"
 )
-async def add_video_filter(
+def add_video_filter(
     session_id: str = Path(..., description="会话ID"),
     request: AddVideoFilterRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
@@ -814,17 +1021,16 @@ async def add_video_filter(
 
     try:
         filter_meta = getattr(Filter_type, request.filter_id)
-        segment.add_filter(filter_meta, intensity=request.intensity)
 
-        # [最终修复 - 正确版]: 将新创建的滤镜素材注册到全局素材列表中
-        for f in segment.filters:
-            if f not in script_file.materials:
-                script_file.materials.filters.append(f)
+        with script_file_manager.get_mutation_lock(session_id):
+            segment.add_filter(filter_meta, intensity=request.intensity)
+
+            # [最终修复 - 正确版]: 将新创建的滤镜素材注册到全局素材列表中(O(1)去重)
+            for f in segment.filters:
+                script_file.materials.add_unique("filters", f)
 
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path)
-        return GeneralEffectResponse(segment_id=request.segment_id, message="滤镜添加成功")
+            schedule_dump(session_id, script_file)  # 延迟合并落盘
+        return _effect_response(segment_id=request.segment_id, message="滤镜添加成功")
     except AttributeError:
         raise HTTPException(status_code=404, detail=f"滤镜 '{request.filter_id}' 不存在")
     except (ValueError, TypeError) as e:
@@ -833,7 +1039,7 @@ async def add_video_filter(
 
 # ============================= 6. 音频效果 API (Audio Effects) ============================= #
 
-class AddAudioFadeRequest(BaseModel):
+class AddAudioFadeRequest(FrozenRequest):
     """添加音频淡入淡出效果的请求体"""
     segment_id: str = Field(..., description="音频片段ID")
     fade_in: int = Field(0, description="淡入时长(微秒)，0表示不使用")
@@ -841,14 +1047,14 @@ class AddAudioFadeRequest(BaseModel):
 
 AudioEffectTypeLiteral = Literal["sound_effect", "tone", "speech_to_song"]
 
-class AddAudioEffectRequest(BaseModel):
+class AddAudioEffectRequest(FrozenRequest):
     """添加音频特效的请求体"""
     segment_id: str = Field(..., description="音频片段ID")
     effect_type: AudioEffectTypeLiteral = Field(..., description="特效类型")
     effect_id: str = Field(..., description="具体特效ID (对应元数据枚举的名称)")
     params: Optional[List[Optional[float]]] = Field(None, description="特效参数列表 (0-100)")
 
-class AdjustVolumeRequest(BaseModel):
+class AdjustVolumeRequest(FrozenRequest):
     """调整音量的请求体"""
     segment_id: str = Field(..., description="音频或视频片段ID")
     volume: float = Field(..., description="音量 (0-2)")
@@ -859,7 +1065,7 @@ class AdjustVolumeRequest(BaseModel):
     response_model=GeneralEffectResponse,
     summary="添加音频淡入淡出效果"
 )
-async def add_audio_fade(
+def add_audio_fade(
     session_id: str = Path(..., description="会话ID"),
     request: AddAudioFadeRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
@@ -869,17 +1075,22 @@ async def add_audio_fade(
     if not segment:
         raise HTTPException(status_code=404, detail=f"ID为 '{request.segment_id}' 的音频片段不存在")
 
+    # 【性能优化】幂等重放: 已存在完全相同的淡入淡出时直接返回成功, 不落盘
+    if (segment.fade is not None
+            and segment.fade.in_duration == request.fade_in
+            and segment.fade.out_duration == request.fade_out):
+        return _effect_response(segment_id=segment.segment_id)
+
     try:
-        segment.add_fade(in_duration=request.fade_in, out_duration=request.fade_out)
-        
-        # 手动将新添加的淡入淡出效果同步到materials中
-        if segment.fade is not None and segment.fade not in script_file.materials.audio_fades:
-            script_file.materials.audio_fades.append(segment.fade)
-        
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path) # 持久化
-        return GeneralEffectResponse(segment_id=segment.segment_id)
+        with script_file_manager.get_mutation_lock(session_id):
+            segment.add_fade(in_duration=request.fade_in, out_duration=request.fade_out)
+
+            # 手动将新添加的淡入淡出效果同步到materials中(O(1)去重)
+            if segment.fade is not None:
+                script_file.materials.add_unique("audio_fades", segment.fade)
+
+            schedule_dump(session_id, script_file)  # 延迟合并落盘
+        return _effect_response(segment_id=segment.segment_id)
     except (ValueError, TypeError) as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -888,7 +1099,7 @@ async def add_audio_fade(
     response_model=GeneralEffectResponse,
     summary="添加音频特效"
 )
-async def add_audio_effect(
+def add_audio_effect(
     session_id: str = Path(..., description="会话ID"),
     request: AddAudioEffectRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
@@ -899,27 +1110,19 @@ async def add_audio_effect(
         raise HTTPException(status_code=404, detail=f"ID为 '{request.segment_id}' 的音频片段不存在")
 
     try:
-        effect_enum = None
-        if request.effect_type == "sound_effect":
-            effect_enum = Audio_scene_effect_type
-        elif request.effect_type == "tone":
-            effect_enum = Tone_effect_type
-        elif request.effect_type == "speech_to_song":
-            effect_enum = Speech_to_song_type
-        
-        effect_meta = getattr(effect_enum, request.effect_id)
-        
-        segment.add_effect(effect_meta, request.params)
-        
-        # 手动将新添加的音频特效同步到materials中
-        # segment.effects列表的最后一个元素就是刚刚添加的特效
-        if segment.effects and segment.effects[-1] not in script_file.materials.audio_effects:
-            script_file.materials.audio_effects.append(segment.effects[-1])
-        
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path) # 持久化
-        return GeneralEffectResponse(segment_id=segment.segment_id)
+        effect_meta = _resolve_enum_member(
+            _AUDIO_EFFECT_ENUMS[request.effect_type], request.effect_id)
+
+        with script_file_manager.get_mutation_lock(session_id):
+            segment.add_effect(effect_meta, request.params)
+
+            # 手动将新添加的音频特效同步到materials中(O(1)去重)
+            # segment.effects列表的最后一个元素就是刚刚添加的特效
+            if segment.effects:
+                script_file.materials.add_unique("audio_effects", segment.effects[-1])
+
+            schedule_dump(session_id, script_file)  # 延迟合并落盘
+        return _effect_response(segment_id=segment.segment_id)
     except AttributeError:
         raise HTTPException(
             status_code=404,
@@ -933,7 +1136,7 @@ async def add_audio_effect(
     response_model=GeneralEffectResponse,
     summary="调整音频音量"
 )
-async def adjust_volume(
+def adjust_volume(
     session_id: str = Path(..., description="会话ID"),
     request: AdjustVolumeRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
@@ -950,18 +1153,19 @@ async def adjust_volume(
             if not segment:
                  raise HTTPException(status_code=404, detail=f"ID为 '{request.segment_id}' 的音频或视频片段不存在")
             
-        segment.volume = request.volume
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path) # 持久化
-        return GeneralEffectResponse(segment_id=request.segment_id, message="音量调整成功")
+        # 【性能优化】幂等重放(客户端重试同一音量)不触发落盘
+        with script_file_manager.get_mutation_lock(session_id):
+            if not math.isclose(segment.volume, request.volume):
+                segment.volume = request.volume
+                schedule_dump(session_id, script_file)  # 延迟合并落盘
+        return _effect_response(segment_id=request.segment_id, message="音量调整成功")
     except (ValueError, TypeError) as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 # ============================= 7. 文本与字幕 API (Text & Subtitles) ============================= #
 
-class SetTextStyleRequest(BaseModel):
+class SetTextStyleRequest(FrozenRequest):
     """设置文本样式的请求体, 参数对齐 core.text_segment.Text_style"""
     segment_id: str = Field(..., description="文本片段ID")
     size: Optional[float] = Field(None, description="字体大小")
@@ -976,14 +1180,14 @@ class SetTextStyleRequest(BaseModel):
     line_spacing: Optional[int] = Field(None, description="行间距")
     font_id: Optional[str] = Field(None, description="字体ID (对应Font_type元数据)")
 
-class SetTextBorderRequest(BaseModel):
+class SetTextBorderRequest(FrozenRequest):
     """添加文本描边的请求体"""
     segment_id: str = Field(..., description="文本片段ID")
     width: float = Field(..., description="描边宽度")
     color: str = Field("#000000", description="描边颜色, 格式'#RRGGBB'")
     alpha: float = Field(1.0, description="描边不透明度 (0-1)", ge=0, le=1)
 
-class SetTextBackgroundRequest(BaseModel):
+class SetTextBackgroundRequest(FrozenRequest):
     """添加文本背景的请求体"""
     segment_id: str = Field(..., description="文本片段ID")
     color: str = Field(..., description="背景颜色, 格式'#RRGGBB'")
@@ -995,7 +1199,7 @@ class SetTextBackgroundRequest(BaseModel):
     horizontal_offset: float = Field(0.5, description="背景水平偏移 (0-1)", ge=0, le=1)
     vertical_offset: float = Field(0.5, description="背景竖直偏移 (0-1)", ge=0, le=1)
 
-class AddTextAnimationRequest(BaseModel):
+class AddTextAnimationRequest(FrozenRequest):
     """添加文本动画的请求体"""
     segment_id: str = Field(..., description="文本片段ID")
     animation_type: Literal["intro", "outro", "loop"] = Field(..., description="动画类型")
@@ -1004,7 +1208,7 @@ class AddTextAnimationRequest(BaseModel):
 
 
 
-class BatchTextStyleParams(BaseModel):
+class BatchTextStyleParams(FrozenRequest):
     """批量设置字幕样式的文本样式参数(不含segment_id)"""
     size: Optional[float] = Field(None, description="字体大小")
     bold: Optional[bool] = Field(None, description="是否加粗")
@@ -1018,13 +1222,13 @@ class BatchTextStyleParams(BaseModel):
     line_spacing: Optional[int] = Field(None, description="行间距")
     font_id: Optional[str] = Field(None, description="字体ID (对应Font_type元数据)")
     
-class BatchTextBorderParams(BaseModel):
+class BatchTextBorderParams(FrozenRequest):
     """批量设置字幕样式的描边参数(不含segment_id)"""
     width: float = Field(..., description="描边宽度")
     color: str = Field("#000000", description="描边颜色, 格式'#RRGGBB'")
     alpha: float = Field(1.0, description="描边不透明度 (0-1)", ge=0, le=1)
 
-class BatchTextBackgroundParams(BaseModel):
+class BatchTextBackgroundParams(FrozenRequest):
     """批量设置字幕样式的背景参数(不含segment_id)"""
     color: str = Field(..., description="背景颜色, 格式'#RRGGBB'")
     style: Literal[1, 2] = Field(1, description="背景样式(1或2)")
@@ -1035,7 +1239,7 @@ class BatchTextBackgroundParams(BaseModel):
     horizontal_offset: float = Field(0.5, description="背景水平偏移 (0-1)", ge=0, le=1)
     vertical_offset: float = Field(0.5, description="背景竖直偏移 (0-1)", ge=0, le=1)
 
-class StyleSubtitlesRequest(BaseModel):
+class StyleSubtitlesRequest(FrozenRequest):
     """批量设置字幕样式的请求体"""
     track_name: str = Field(..., description="要修改样式的字幕轨道名称")
     text_style: Optional[BatchTextStyleParams] = Field(None, description="要应用的文本样式")
@@ -1054,7 +1258,7 @@ class StyleSubtitlesResponse(BaseModel):
     response_model=GeneralEffectResponse,
     summary="设置文本样式"
 )
-async def set_text_style(
+def set_text_style(
     session_id: str = Path(..., description="会话ID"),
     request: SetTextStyleRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
@@ -1069,36 +1273,45 @@ async def set_text_style(
         raise HTTPException(status_code=404, detail="文本片段未找到")
 
     try:
+        changed = False
+
         # 1. 处理字体ID
+        font_value = None
         if request.font_id:
             try:
-                font_enum_member = getattr(Font_type, request.font_id)
-                segment.font = font_enum_member.value
+                font_value = getattr(Font_type, request.font_id).value
             except AttributeError:
                 raise HTTPException(status_code=404, detail=f"字体 '{request.font_id}' 不存在")
 
-        # 2. 创建一个新的 Text_style 实例来替换旧的
-        current_style = segment.style
-        style_params = {
-            "size": request.size if request.size is not None else current_style.size,
-            "bold": request.bold if request.bold is not None else current_style.bold,
-            "italic": request.italic if request.italic is not None else current_style.italic,
-            "underline": request.underline if request.underline is not None else current_style.underline,
-            "color": hex_to_rgb_normalized(request.color) if request.color is not None else current_style.color,
-            "alpha": request.alpha if request.alpha is not None else current_style.alpha,
-            "align": request.align if request.align is not None else current_style.align,
-            "vertical": request.vertical if request.vertical is not None else current_style.vertical,
-            "letter_spacing": request.letter_spacing if request.letter_spacing is not None else current_style.letter_spacing,
-            "line_spacing": request.line_spacing if request.line_spacing is not None else current_style.line_spacing,
-        }
-        segment.style = Text_style(**style_params)
-
-        # 持久化
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path)
-
-        return GeneralEffectResponse(segment_id=request.segment_id, message="文本样式更新成功")
+        with script_file_manager.get_mutation_lock(session_id):
+            if font_value is not None and segment.font != font_value:
+                segment.font = font_value
+                changed = True
+
+            # 2. 创建一个新的 Text_style 实例来替换旧的
+            current_style = segment.style
+            style_params = {
+                "size": request.size if request.size is not None else current_style.size,
+                "bold": request.bold if request.bold is not None else current_style.bold,
+                "italic": request.italic if request.italic is not None else current_style.italic,
+                "underline": request.underline if request.underline is not None else current_style.underline,
+                "color": hex_to_rgb_normalized(request.color) if request.color is not None else current_style.color,
+                "alpha": request.alpha if request.alpha is not None else current_style.alpha,
+                "align": request.align if request.align is not None else current_style.align,
+                "vertical": request.vertical if request.vertical is not None else current_style.vertical,
+                "letter_spacing": request.letter_spacing if request.letter_spacing is not None else current_style.letter_spacing,
+                "line_spacing": request.line_spacing if request.line_spacing is not None else current_style.line_spacing,
+            }
+            # 【性能优化】所有字段均与当前样式一致时为幂等重放, 不替换也不落盘
+            if any(value != getattr(current_style, name) for name, value in style_params.items()):
+                segment.style = Text_style(**style_params)
+                changed = True
+
+            # 持久化
+            if changed:
+                schedule_dump(session_id, script_file)  # 延迟合并落盘
+
+        return _effect_response(segment_id=request.segment_id, message="文本样式更新成功")
     except (ValueError, TypeError, AttributeError) as e:
         raise HTTPException(status_code=400, detail=f"设置文本样式失败: {e}")
 
@@ -1107,7 +1320,7 @@ async def set_text_style(
     response_model=GeneralEffectResponse,
     summary="添加文本描边"
 )
-async def set_text_border(
+def set_text_border(
     session_id: str = Path(..., description="会话ID"),
     request: SetTextBorderRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
@@ -1126,12 +1339,10 @@ async def set_text_border(
             color=border_color_rgb,
             alpha=request.alpha
         )
-        segment.border = border_instance # 直接赋值
-
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path) # 持久化
-        return GeneralEffectResponse(segment_id=segment.segment_id, message="文本描边设置成功")
+        with script_file_manager.get_mutation_lock(session_id):
+            segment.border = border_instance # 直接赋值
+            schedule_dump(session_id, script_file)  # 延迟合并落盘
+        return _effect_response(segment_id=segment.segment_id, message="文本描边设置成功")
     except (ValueError, TypeError) as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1140,7 +1351,7 @@ async def set_text_border(
     response_model=GeneralEffectResponse,
     summary="添加文本背景"
 )
-async def set_text_background(
+def set_text_background(
     session_id: str = Path(..., description="会话ID"),
     request: SetTextBackgroundRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
@@ -1162,12 +1373,10 @@ async def set_text_background(
             horizontal_offset=request.horizontal_offset,
             vertical_offset=request.vertical_offset
         )
-        segment.background = background_instance # 直接赋值
-
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path) # 持久化
-        return GeneralEffectResponse(segment_id=segment.segment_id, message="文本背景设置成功")
+        with script_file_manager.get_mutation_lock(session_id):
+            segment.background = background_instance # 直接赋值
+            schedule_dump(session_id, script_file)  # 延迟合并落盘
+        return _effect_response(segment_id=segment.segment_id, message="文本背景设置成功")
     except (ValueError, TypeError) as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1176,7 +1385,7 @@ async def set_text_background(
     response_model=GeneralEffectResponse,
     summary="添加文本动画"
 )
-async def add_text_animation(
+def add_text_animation(
     session_id: str = Path(..., description="会话ID"),
     request: AddTextAnimationRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
@@ -1186,43 +1395,66 @@ async def add_text_animation(
     if not segment:
         raise HTTPException(status_code=404, detail="文本片段未找到")
 
-    anim_enum = None
-    if request.animation_type == "intro":
-        anim_enum = Text_intro
-    elif request.animation_type == "outro":
-        anim_enum = Text_outro
-    elif request.animation_type == "loop":
-        anim_enum = Text_loop_anim
-
-    if not anim_enum:
-        raise HTTPException(status_code=400, detail="无效的动画类型")
-
     try:
-        # 使用getattr通过字符串名称从枚举中获取成员
-        anim_type = getattr(anim_enum, request.animation_id)
+        anim_type = _resolve_enum_member(
+            _TEXT_ANIM_ENUMS[request.animation_type], request.animation_id)
     except AttributeError:
         raise HTTPException(
             status_code=404,
             detail=f"类型为'{request.animation_type}'的动画 '{request.animation_id}' 不存在"
         )
 
-    # 核心库中使用 add_animation 方法, 且参数为位置参数
-    segment.add_animation(anim_type, request.duration)
-    
-    # [修复] 将新创建的动画素材注册到全局素材列表中
-    if segment.animations_instance and segment.animations_instance not in script_file.materials.animations:
-        script_file.materials.animations.append(segment.animations_instance)
+    with script_file_manager.get_mutation_lock(session_id):
+        # 核心库中使用 add_animation 方法, 且参数为位置参数
+        segment.add_animation(anim_type, request.duration)
+
+        # [修复] 将新创建的动画素材注册到全局素材列表中(O(1)去重)
+        if segment.animations_instance:
+            script_file.materials.add_unique("animations", segment.animations_instance)
+
+        # 持久化
+        schedule_dump(session_id, script_file)  # 延迟合并落盘
+
+    return _effect_response(segment_id=request.segment_id, message="文本动画添加成功")
+
+
 
-    # 持久化
-    session_dir = path_manager.get_session_dir(session_id)
-    output_path = path_manager.get_draft_content_path(session_id)
-    script_file.dump(output_path)
 
-    return GeneralEffectResponse(segment_id=request.segment_id, message="文本动画添加成功")
 
+def _apply_subtitle_styles(text_segments: List[CoreTextSegment],
+                           req_style, style_color, font_value,
+                           shared_border, shared_background) -> None:
+    """对片段列表逐个应用样式/描边/背景, 在线程池中同步执行
 
+    所有入参在调用前已完成校验与预构建, 循环内只有属性赋值。
+    """
+    for segment in text_segments:
+        # 更新文本样式 (新样式以当前片段样式为底, 不能跨片段共享)
+        if req_style:
+            current_style = segment.style
+            segment.style = Text_style(
+                size=req_style.size if req_style.size is not None else current_style.size,
+                bold=req_style.bold if req_style.bold is not None else current_style.bold,
+                italic=req_style.italic if req_style.italic is not None else current_style.italic,
+                underline=req_style.underline if req_style.underline is not None else current_style.underline,
+                color=style_color if style_color is not None else current_style.color,
+                alpha=req_style.alpha if req_style.alpha is not None else current_style.alpha,
+                align=req_style.align if req_style.align is not None else current_style.align,
+                vertical=req_style.vertical if req_style.vertical is not None else current_style.vertical,
+                letter_spacing=req_style.letter_spacing if req_style.letter_spacing is not None else current_style.letter_spacing,
+                line_spacing=req_style.line_spacing if req_style.line_spacing is not None else current_style.line_spacing,
+            )
+
+            if font_value is not None:
+                segment.font = font_value
 
+        # 更新文本描边
+        if shared_border is not None:
+            segment.border = shared_border
 
+        # 更新文本背景
+        if shared_background is not None:
+            segment.background = shared_background
 
 @router.post(
     "/{session_id}/subtitles/style",
@@ -1242,66 +1474,57 @@ async def style_subtitles(
     if track.track_type != Track_type.text:
         raise HTTPException(status_code=400, detail=f"轨道 '{request.track_name}' 不是文本轨道")
 
-    updated_segments_count = 0
-    for segment in track.segments:
-        if isinstance(segment, CoreTextSegment):
+    # 【性能优化】循环不变量全部提到循环外: 颜色解析、字体解析只做一次,
+    # 描边/背景对所有片段相同, 预构建一个共享实例(片段只读引用, 不会就地修改)
+    style_color = None
+    font_value = None
+    if request.text_style:
+        if request.text_style.color is not None:
+            style_color = hex_to_rgb_normalized(request.text_style.color)
+        if request.text_style.font_id:
             try:
-                # 更新文本样式
-                if request.text_style:
-                    current_style = segment.style
-                    style_params = {
-                        "size": request.text_style.size if request.text_style.size is not None else current_style.size,
-                        "bold": request.text_style.bold if request.text_style.bold is not None else current_style.bold,
-                        "italic": request.text_style.italic if request.text_style.italic is not None else current_style.italic,
-                        "underline": request.text_style.underline if request.text_style.underline is not None else current_style.underline,
-                        "color": hex_to_rgb_normalized(request.text_style.color) if request.text_style.color is not None else current_style.color,
-                        "alpha": request.text_style.alpha if request.text_style.alpha is not None else current_style.alpha,
-                        "align": request.text_style.align if request.text_style.align is not None else current_style.align,
-                        "vertical": request.text_style.vertical if request.text_style.vertical is not None else current_style.vertical,
-                        "letter_spacing": request.text_style.letter_spacing if request.text_style.letter_spacing is not None else current_style.letter_spacing,
-                        "line_spacing": request.text_style.line_spacing if request.text_style.line_spacing is not None else current_style.line_spacing,
-                    }
-                    segment.style = Text_style(**style_params)
-
-                    # 处理字体
-                    if request.text_style.font_id:
-                        try:
-                            font_enum_member = getattr(Font_type, request.text_style.font_id)
-                            segment.font = font_enum_member.value
-                        except AttributeError:
-                            logging.warning(f"警告: 字体 '{request.text_style.font_id}' 无效，已跳过。")
-                
-                # 更新文本描边
-                if request.text_border:
-                    border_color_rgb = hex_to_rgb_normalized(request.text_border.color)
-                    segment.border = Text_border(
-                        width=request.text_border.width,
-                        color=border_color_rgb,
-                        alpha=request.text_border.alpha
-                    )
-
-                # 更新文本背景
-                if request.text_background:
-                    segment.background = Text_background(
-                        color=request.text_background.color,
-                        style=request.text_background.style,
-                        alpha=request.text_background.alpha,
-                        round_radius=request.text_background.round_radius,
-                        height=request.text_background.height,
-                        width=request.text_background.width,
-                        horizontal_offset=request.text_background.horizontal_offset,
-                        vertical_offset=request.text_background.vertical_offset
-                    )
-                
-                updated_segments_count += 1
-            except (ValueError, TypeError) as e:
-                logging.warning(f"警告: 处理片段 {segment.segment_id} 样式失败，已跳过。错误: {e}")
-                continue
-            
-    # 保存草稿
-    session_dir = path_manager.get_session_dir(session_id)
-    output_path = path_manager.get_draft_content_path(session_id)
-    script_file.dump(output_path)
+                font_value = getattr(Font_type, request.text_style.font_id).value
+            except AttributeError:
+                logger.warning("警告: 字体 '%s' 无效，已跳过。", request.text_style.font_id)
+
+    shared_border = None
+    if request.text_border:
+        shared_border = Text_border(
+            width=request.text_border.width,
+            color=hex_to_rgb_normalized(request.text_border.color),
+            alpha=request.text_border.alpha
+        )
+
+    shared_background = None
+    if request.text_background:
+        shared_background = Text_background(
+            color=request.text_background.color,
+            style=request.text_background.style,
+            alpha=request.text_background.alpha,
+            round_radius=request.text_background.round_radius,
+            height=request.text_background.height,
+            width=request.text_background.width,
+            horizontal_offset=request.text_background.horizontal_offset,
+            vertical_offset=request.text_background.vertical_offset
+        )
+
+    # 【性能优化】先一次性筛出文本片段, 循环体内不再做isinstance检查和
+    # 逐次try/except; 所有输入相关的校验已在循环外完成, 循环内只剩属性赋值。
+    # 大轨道(上千条字幕)下整个循环是纯CPU工作, 放进线程池执行,
+    # 避免事件循环被阻塞数十毫秒而拖慢其他并发会话
+    text_segments = [s for s in track.segments if isinstance(s, CoreTextSegment)]
+
+    def _locked_apply():
+        # 锁与循环一起放进线程池, 等锁时不阻塞事件循环
+        with script_file_manager.get_mutation_lock(session_id):
+            _apply_subtitle_styles(text_segments, request.text_style,
+                                   style_color, font_value,
+                                   shared_border, shared_background)
+            schedule_dump(session_id, script_file)  # 延迟合并落盘
+
+    await run_in_threadpool(_locked_apply)
+
+    updated_segments_count = len(text_segments)
 
     return StyleSubtitlesResponse(
         track_name=request.track_name,
@@ -1314,58 +1537,99 @@ async def style_subtitles(
 
 # 从Keyframe_property枚举动态创建Literal类型
 KeyframePropertyLiteral = Literal[
-    "position_x", "position_y", "rotation", "scale_x", "scale_y", 
+    "position_x", "position_y", "rotation", "scale_x", "scale_y",
     "uniform_scale", "alpha", "volume"
 ]
 
-class AddKeyframeRequest(BaseModel):
+# 【性能优化】属性名 -> 枚举成员在导入时一次性解析, 请求期间只剩字典查找
+# (未知属性名同样抛KeyError, 错误处理路径不变)
+_KEYFRAME_PROP_MAP = {
+    name: Keyframe_property[name]
+    for name in ("position_x", "position_y", "rotation", "scale_x", "scale_y",
+                 "uniform_scale", "alpha", "volume")
+}
+
+class AddKeyframeRequest(FrozenRequest):
     """添加关键帧的请求体"""
     segment_id: str = Field(..., description="片段ID")
     property: KeyframePropertyLiteral = Field(..., description="要添加关键帧的属性")
     time_offset: int = Field(..., description="关键帧在片段内的时间偏移量 (微秒)")
     value: float = Field(..., description="属性在该时间点的值")
 
+class KeyframeModel(FrozenRequest):
+    """单个关键帧(批量接口用, 不含segment_id)"""
+    property: KeyframePropertyLiteral = Field(..., description="要添加关键帧的属性")
+    time_offset: int = Field(..., description="关键帧在片段内的时间偏移量 (微秒)")
+    value: float = Field(..., description="属性在该时间点的值")
+
+class AddKeyframesBatchRequest(FrozenRequest):
+    """批量添加关键帧的请求体: 同一片段的一组关键帧(通常是一条动画曲线)"""
+    segment_id: str = Field(..., description="片段ID")
+    keyframes: List[KeyframeModel] = Field(..., description="要添加的关键帧列表")
+
+def _apply_keyframes(script_file: Script_file, segment_id: str,
+                     keyframes) -> None:
+    """查找片段并依次写入关键帧, 供单条与批量接口共用"""
+    target_segment = script_file._segment_index.get(segment_id)
+
+    if not target_segment:
+        raise HTTPException(status_code=404, detail=f"ID为 {segment_id} 的片段不存在")
+
+    try:
+        for kf in keyframes:
+            prop_enum = _KEYFRAME_PROP_MAP[kf.property]
+            target_segment.add_keyframe(prop_enum, kf.time_offset, kf.value)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"不支持的属性: {kf.property}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"添加关键帧失败: {e}")
+
 @router.post(
     "/{session_id}/keyframes",
     response_model=GeneralEffectResponse,
     summary="添加关键帧"
 )
-async def add_keyframe(
+def add_keyframe(
     session_id: str = Path(..., description="会话ID"),
     request: AddKeyframeRequest = Body(...),
     script_file: Script_file = Depends(get_script_file_from_session_id)
 ):
     """
     为视觉或音频片段的特定属性添加关键帧。
-    
+
     支持的属性包括位置、缩放、旋转和音量。
     """
-    # 查找目标片段
-    target_segment = None
-    for track in script_file.tracks.values():
-        for segment in track.segments:
-            if segment.segment_id == request.segment_id:
-                target_segment = segment
-                break
-        if target_segment:
-            break
-            
-    if not target_segment:
-        raise HTTPException(status_code=404, detail=f"ID为 {request.segment_id} 的片段不存在")
+    with script_file_manager.get_mutation_lock(session_id):
+        _apply_keyframes(script_file, request.segment_id, (request,))
 
-    # 添加关键帧
-    try:
-        prop_enum = Keyframe_property[request.property]
-        target_segment.add_keyframe(prop_enum, request.time_offset, request.value)
-        
         # 持久化
-        session_dir = path_manager.get_session_dir(session_id)
-        output_path = path_manager.get_draft_content_path(session_id)
-        script_file.dump(output_path) 
-        
-        return GeneralEffectResponse(segment_id=request.segment_id, message="关键帧添加成功")
-    except KeyError:
-        raise HTTPException(status_code=400, detail=f"不支持的属性: {request.property}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"添加关键帧失败: {e}")
+        schedule_dump(session_id, script_file)  # 延迟合并落盘
+
+    return _effect_response(segment_id=request.segment_id, message="关键帧添加成功")
+
+@router.post(
+    "/{session_id}/keyframes/batch",
+    response_model=GeneralEffectResponse,
+    summary="批量添加关键帧"
+)
+def add_keyframes_batch(
+    session_id: str = Path(..., description="会话ID"),
+    request: AddKeyframesBatchRequest = Body(...),
+    script_file: Script_file = Depends(get_script_file_from_session_id)
+):
+    """
+    为同一片段一次性添加多个关键帧(如一条完整的动画曲线)。
+
+    相比逐条POST /keyframes, 片段查找与草稿落盘只发生一次。
+    """
+    with script_file_manager.get_mutation_lock(session_id):
+        _apply_keyframes(script_file, request.segment_id, request.keyframes)
+
+        # 持久化
+        schedule_dump(session_id, script_file)  # 延迟合并落盘
+
+    return _effect_response(
+        segment_id=request.segment_id,
+        message=f"成功添加 {len(request.keyframes)} 个关键帧"
+    )
 
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from pydantic_settings import BaseSettings
 from pydantic import Field, model_validator
 from typing import Optional
@@ -101,4 +102,52 @@ class Settings(BaseSettings):
         env_file_encoding = 'utf-8'
 
 # 创建一个全局可用的配置实例
-settings = Settings() 
\ No newline at end of file
+settings = Settings()
+
+@dataclass(frozen=True, slots=True)
+class RuntimeConfig:
+    """
+    启动校验完成后的只读配置快照。
+
+    【性能优化】pydantic模型的属性访问要经过描述符链, 中间件/日志等
+    每请求读取的配置走frozen+slots数据类, 属性读取是C级的槽位加载。
+    字段与Settings一一对应, 启动后由settings.model_dump()填充。
+    """
+    PROJECT_NAME: str
+    API_V1_STR: str
+    DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str]
+    DB_ECHO: bool
+    DATA_DIR: str
+    R2_ENDPOINT_URL: str
+    R2_ACCESS_KEY_ID: str
+    R2_SECRET_ACCESS_KEY: str
+    R2_BUCKET_NAME: str
+    R2_REGION: str
+    R2_PUBLIC_URL: str
+    SERVER_HOST: str
+    SERVER_PORT: int
+    SYSTEM_MONITOR_INTERVAL: int
+    LOG_LEVEL: str
+    ENABLE_COLORED_LOGS: bool
+    ENABLE_EMOJI_LOGS: bool
+    SLOW_REQUEST_THRESHOLD: float
+    MEMORY_CHANGE_THRESHOLD: float
+    QUEUE_INITIAL_CONCURRENT_TASKS: int
+    QUEUE_MIN_CONCURRENT_TASKS: int
+    QUEUE_MAX_CONCURRENT_TASKS: int
+    QUEUE_MAX_WAIT_TIME: float
+    CPU_HIGH_THRESHOLD: float
+    CPU_CRITICAL_THRESHOLD: float
+    MEMORY_HIGH_THRESHOLD: float
+    MEMORY_CRITICAL_THRESHOLD: float
+    MEMORY_MIN_RESERVE_MB: float
+    RESPONSE_TIME_HIGH_THRESHOLD: float
+    RESPONSE_TIME_CRITICAL_THRESHOLD: float
+    LOW_LOAD_CPU_THRESHOLD: float
+    LOW_LOAD_MEMORY_THRESHOLD: float
+    LOW_LOAD_RESPONSE_TIME_THRESHOLD: float
+    SLOT_RESERVE_COUNT: int
+
+# 热路径使用的配置快照 (环境变量只在启动时读取, 运行期配置不变)
+runtime = RuntimeConfig(**settings.model_dump())
\ No newline at end of file
@@ -3,6 +3,11 @@ import json
 import math
 from copy import deepcopy
 
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖, 缺失时回退到标准库json
+    orjson = None
+
 from typing import Optional, Literal, Union, overload
 from typing import Type, Dict, List, Any
 
@@ -68,6 +73,36 @@ class Script_material:
         self.filters = []
         self.canvases = []
 
+        self._known_ids = {name: set() for name in self._UNIQUE_KEY_ATTRS}
+
+    _UNIQUE_KEY_ATTRS = {
+        "videos": "material_id",
+        "audios": "material_id",
+        "audio_fades": "fade_id",
+        "audio_effects": "effect_id",
+        "animations": "animation_id",
+        "video_effects": "global_id",
+        "transitions": "global_id",
+        "filters": "global_id",
+    }
+
+    def add_unique(self, list_name: str, obj) -> None:
+        """按稳定id去重后追加到指定素材列表, 已存在时不做任何事
+
+        为每个列表旁路维护一个已知id集合: 命中集合是O(1)快路径; 未命中时
+        退回一次线性查重(兼容未经此方法直接append的对象), 并将id记入集合,
+        此后对同一素材的重复注册不再扫描列表。
+        """
+        attr = self._UNIQUE_KEY_ATTRS[list_name]
+        key = getattr(obj, attr)
+        known = self._known_ids[list_name]
+        if key in known:
+            return
+        target_list = getattr(self, list_name)
+        if all(getattr(item, attr, None) != key for item in target_list):
+            target_list.append(obj)
+        known.add(key)
+
     @overload
     def __contains__(self, item: Union[Video_material, Audio_material]) -> bool: ...
     @overload
@@ -164,6 +199,9 @@ class Script_file:
     tracks: Dict[str, Track]
     """轨道信息"""
 
+    _segment_index: Dict[str, Base_segment]
+    """segment_id -> 片段实例的索引, 供按id查找时避免遍历所有轨道"""
+
     def __init__(self, width: int, height: int, fps: int = 30):
         """创建一个剪映草稿
 
@@ -179,6 +217,7 @@ class Script_file:
 
         self.materials = Script_material()
         self.tracks = {}
+        self._segment_index = {}
 
         # 创建基础的草稿内容结构
         self.content = {
@@ -335,6 +374,7 @@ class Script_file:
 
         # 加入轨道并更新时长
         target.add_segment(segment)
+        self._segment_index[segment.segment_id] = segment
         self.duration = max(self.duration, segment.end)
 
         # 自动添加相关素材
@@ -413,6 +453,7 @@ class Script_file:
         # 加入轨道并更新时长
         segment = Effect_segment(effect, t_range, params)
         target.add_segment(segment)
+        self._segment_index[segment.segment_id] = segment
         self.duration = max(self.duration, t_range.start + t_range.duration)
 
         # 自动添加相关素材
@@ -440,6 +481,7 @@ class Script_file:
         # 加入轨道并更新时长
         segment = Filter_segment(filter_meta, t_range, intensity / 100.0)  # 转换为0-1范围
         target.add_segment(segment)
+        self._segment_index[segment.segment_id] = segment
         self.duration = max(self.duration, t_range.end)
 
         # 自动添加相关素材
@@ -525,8 +567,8 @@ class Script_file:
 
         return self
 
-    def dumps(self) -> str:
-        """将草稿文件内容导出为JSON字符串"""
+    def _build_content(self) -> Dict[str, Any]:
+        """将当前内存状态同步到content字典并返回"""
         self.content["fps"] = self.fps
         self.content["duration"] = self.duration
         self.content["canvas_config"] = {"width": self.width, "height": self.height, "ratio": "original"}
@@ -538,7 +580,7 @@ class Script_file:
                 for segment in track.segments:
                     if isinstance(segment, Text_segment):
                         self.materials.texts.append(segment.export_material())
-        
+
         self.content["materials"] = self.materials.export_json()
 
         # 对轨道排序并导出
@@ -546,9 +588,40 @@ class Script_file:
         track_list.sort(key=lambda track: track.render_index)
         self.content["tracks"] = [track.export_json() for track in track_list]
 
-        return json.dumps(self.content, ensure_ascii=False, indent=4)
+        return self.content
+
+    def dumps(self) -> str:
+        """将草稿文件内容导出为JSON字符串"""
+        return json.dumps(self._build_content(), ensure_ascii=False, indent=4)
+
+    def to_json_bytes(self) -> bytes:
+        """将草稿文件内容导出为UTF-8编码的JSON字节串
+
+        优先使用orjson(序列化耗时约为标准库的1/3~1/5, 且直接产出bytes);
+        缩进仅为可读性, orjson的2空格与标准库的4空格差异不影响剪映解析。
+        """
+        if orjson is not None:
+            return orjson.dumps(self._build_content(), option=orjson.OPT_INDENT_2)
+        return self.dumps().encode("utf-8")
 
-    def dump(self, file_path: str) -> None:
-        """将草稿文件内容写入文件"""
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(self.dumps())
+    def dump(self, file_path: str, *, fsync: bool = False) -> None:
+        """将草稿文件内容原子性地写入文件
+
+        先完整序列化为字节串并单次os.write到临时文件, 再os.replace原子替换
+        目标文件: 即使进程在写入中途崩溃, 磁盘上也始终是某个完整版本的草稿。
+
+        Args:
+            fsync (`bool`, optional): 是否在替换前fsync临时文件. 默认为False.
+                高频编辑的写回路径跳过fsync以免磁盘延迟主导请求耗时,
+                仅在保存/导出等必须持久的边界上传入True.
+        """
+        data = self.to_json_bytes()
+        tmp_path = file_path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data)
+            if fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, file_path)
@@ -151,6 +151,11 @@ class Clip_settings:
         }
         return clip_settings_json
 
+# 全默认设置的共享单例: 大量片段不做任何图像变换, 共享同一个实例以避免
+# 高频添加片段时的小对象分配. 注意: 不应就地修改此实例, 需要自定义设置时
+# 应创建新的Clip_settings对象
+Clip_settings.DEFAULT = Clip_settings()
+
 class Media_segment(Base_segment):
     """媒体片段基类"""
 
@@ -213,7 +218,7 @@ class Visual_segment(Media_segment):
         """
         super().__init__(material_id, source_timerange, target_timerange, speed, volume)
 
-        self.clip_settings = clip_settings if clip_settings is not None else Clip_settings()
+        self.clip_settings = clip_settings if clip_settings is not None else Clip_settings.DEFAULT
         self.uniform_scale = True
         self.animations_instance = None
 
@@ -6,7 +6,7 @@ from fastapi.responses import JSONResponse
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from app.api.v1 import api_router
 from app.config import settings
-from app.database.session import init_db, get_db_session_context
+from app.database.session import init_db, get_db_session_context, run_pragma_optimize
 from app.utils.r2_client import r2_client
 from app.services.session_cleaner import cleanup_expired_sessions
 from app.middleware.performance_middleware import PerformanceMiddleware, ResourceLimitMiddleware
@@ -57,6 +57,7 @@ async def lifespan(app: FastAPI):
     
     # 启动后台调度任务
     scheduler.add_job(run_cleanup_job, 'interval', hours=1, id="session_cleanup_job")
+    scheduler.add_job(run_pragma_optimize, 'interval', seconds=900, id="sqlite_optimize_job")
     scheduler.start()
     logger.info("🗓️ 已启动会话清理后台任务，每小时运行一次")
     
@@ -70,7 +71,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown logic
     logger.info("🌙 服务正在关闭...")
-    
+
+    # 落盘所有处于写回合并窗口中的草稿，避免丢失最后的编辑
+    from app.api.v1.sessions import flush_pending_dumps
+    await flush_pending_dumps()
+    logger.info("💾 待写草稿已全部落盘")
+
     # 停止系统监控
     await system_monitor.stop()
     logger.info("📊 系统资源监控已停止")
@@ -6,7 +6,7 @@ from app.utils.performance_monitor import performance_monitor
 from app.services.adaptive_queue_manager import adaptive_queue_manager
 from app.utils.logger_config import api_logger
 from app.services.system_monitor import perf_logger
-from app.config import settings
+from app.config import runtime
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +25,9 @@ class PerformanceMiddleware(BaseHTTPMiddleware):
         # 检查是否为需要资源控制的端点
         if self.is_resource_intensive_endpoint(request.url.path):
             # 尝试获取任务槽位，支持排队等待
-            if not await adaptive_queue_manager.acquire_task_slot(max_wait_time=settings.QUEUE_MAX_WAIT_TIME):
+            if not await adaptive_queue_manager.acquire_task_slot(max_wait_time=runtime.QUEUE_MAX_WAIT_TIME):
                 # 等待超时，建议客户端重试
-                api_logger.log_queue_wait(request.url.path, settings.QUEUE_MAX_WAIT_TIME, session_id)
+                api_logger.log_queue_wait(request.url.path, runtime.QUEUE_MAX_WAIT_TIME, session_id)
                 raise HTTPException(
                     status_code=429,  # Too Many Requests
                     detail={
@@ -35,7 +35,7 @@ class PerformanceMiddleware(BaseHTTPMiddleware):
                         "message": "服务器正在处理大量请求，已为您排队等待30秒，请稍后重试",
                         "retry_after": 15,
                         "queue_info": {
-                            "waited_time": settings.QUEUE_MAX_WAIT_TIME,
+                            "waited_time": runtime.QUEUE_MAX_WAIT_TIME,
                             "suggestion": "系统繁忙，建议15秒后重试"
                         }
                     }
@@ -120,8 +120,8 @@ class ResourceLimitMiddleware(BaseHTTPMiddleware):
         
         # 只有在系统即将崩溃时才完全拒绝服务
         # 使用配置文件中的临界阈值，并且只拒绝重资源操作
-        if (metrics.cpu_percent > settings.CPU_CRITICAL_THRESHOLD or 
-            metrics.memory_available_mb < settings.MEMORY_MIN_RESERVE_MB):
+        if (metrics.cpu_percent > runtime.CPU_CRITICAL_THRESHOLD or 
+            metrics.memory_available_mb < runtime.MEMORY_MIN_RESERVE_MB):
             if self.is_heavy_resource_endpoint(request.url.path):
                 logger.error(f"系统资源极限，拒绝重资源请求: CPU={metrics.cpu_percent}%, 可用内存={metrics.memory_available_mb}MB")
                 raise HTTPException(
@@ -15,6 +15,7 @@ from app.config import settings
 from app.database.models import Material as MaterialModel
 from app.core.script_file import Script_file
 from app.core.local_materials import Video_material, Audio_material
+from app.services.script_file_manager import script_file_manager
 from app.utils.r2_client import r2_client
 from app.utils.media_analyzer import media_analyzer, MediaAnalysisResult
 from app.utils.path_manager import path_manager
@@ -194,7 +195,9 @@ class MaterialManager:
             
             if material_instance:
                 material_instance.material_id = new_material_db.material_id
-                script_file.add_material(material_instance)
+                # 会话锁内追加素材, 与线程中的编辑/落盘互斥
+                with script_file_manager.get_mutation_lock(session_id):
+                    script_file.add_material(material_instance)
 
         return new_material_db, analysis_result
 
@@ -285,6 +288,8 @@ class MaterialManager:
             
             if material_instance:
                 material_instance.material_id = new_material_db.material_id
-                script_file.add_material(material_instance)
+                # 会话锁内追加素材, 与线程中的编辑/落盘互斥
+                with script_file_manager.get_mutation_lock(session_id):
+                    script_file.add_material(material_instance)
 
         return new_material_db, analysis_result 
\ No newline at end of file
@@ -4,6 +4,11 @@ import logging
 import asyncio
 import threading
 from cachetools import LRUCache
+
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖, 缺失时回退到标准库json
+    orjson = None
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.script_file import Script_file
@@ -20,6 +25,9 @@ class ScriptFileManager:
     在内存中管理和缓存不同会话的 `Script_file` 实例。
     确保 API 在多次请求之间能够操作同一个草稿对象。
     """
+    # 锁表分片数量, 必须为2的幂, 以便用位与运算取桶
+    _SHARD_COUNT = 64
+
     def __init__(self, capacity: int = 100):
         """
         初始化一个LRU (最近最少使用) 缓存来存储 Script_file 实例。
@@ -28,34 +36,75 @@ class ScriptFileManager:
             capacity (int): 缓存可以容纳的最大会话实例数量。
         """
         self.cache = LRUCache(maxsize=capacity)
-        self.locks = {} # 为每个会話ID创建一个专用的锁
-        # 【关键修复】添加全局锁保护locks字典的并发访问
-        self._locks_creation_lock = threading.Lock()
+        # 【性能优化】将会话锁表按session_id哈希分片:
+        # 每个分片由独立的线程锁保护, 不同分片上的会话创建锁时互不阻塞,
+        # 避免所有会话竞争同一把全局创建锁。
+        self._lock_shards = [
+            (threading.Lock(), {}) for _ in range(self._SHARD_COUNT)
+        ]
+        # 会话互斥编辑锁表, 与上面的加载锁同样按session_id分片
+        self._mutation_lock_shards = [
+            (threading.Lock(), {}) for _ in range(self._SHARD_COUNT)
+        ]
+
+    def _get_shard(self, session_id: str):
+        """根据session_id哈希选取对应的锁表分片"""
+        return self._lock_shards[hash(session_id) & (self._SHARD_COUNT - 1)]
 
     def _get_or_create_lock(self, session_id: str) -> asyncio.Lock:
         """
-        【关键修复】获取或创建与特定session_id关联的锁
-        使用线程锁确保在高并发下不会为同一个session_id创建多个Lock
+        获取或创建与特定session_id关联的锁。
+        仅锁定session_id所在的分片, 不同分片上的会话互不竞争。
         """
+        shard_lock, locks = self._get_shard(session_id)
+
         # 先进行无锁检查（快速路径）
-        if session_id in self.locks:
-            return self.locks[session_id]
-        
-        # 需要创建新锁时，使用线程锁保护
-        with self._locks_creation_lock:
+        lock = locks.get(session_id)
+        if lock is not None:
+            return lock
+
+        # 需要创建新锁时，仅锁定所在分片
+        with shard_lock:
             # 双重检查：可能在等待锁期间其他线程已经创建了
-            if session_id not in self.locks:
-                self.locks[session_id] = asyncio.Lock()
-            return self.locks[session_id]
+            if session_id not in locks:
+                locks[session_id] = asyncio.Lock()
+            return locks[session_id]
+
+    def get_mutation_lock(self, session_id: str) -> threading.Lock:
+        """获取会话的互斥编辑锁
+
+        共享同一Script_file实例的并发请求必须串行化"修改+调度落盘",
+        否则晚到的落盘可能用旧状态覆盖新编辑。由于编辑端点混合了
+        async def与线程池中运行的普通def, 这里用threading.Lock而非
+        asyncio.Lock; 临界区只有纯内存修改, 持锁时间极短。
+        """
+        shard_lock, locks = self._mutation_lock_shards[
+            hash(session_id) & (self._SHARD_COUNT - 1)]
+
+        lock = locks.get(session_id)
+        if lock is not None:
+            return lock
+
+        with shard_lock:
+            if session_id not in locks:
+                locks[session_id] = threading.Lock()
+            return locks[session_id]
 
     def _load_script_from_file(self, path: str, session_db_obj: SessionModel) -> Script_file:
         """
         [最终修复版] 从磁盘加载并重建 Script_file 对象。
         此函数直接调用核心库中新增的 from_dict 方法。
         """
-        with open(path, 'r', encoding='utf-8') as f:
-            content = json.load(f)
-        
+        # 【性能优化】以二进制读入, 让解析器直接吃bytes:
+        # 省掉文本模式的整文件UTF-8解码, orjson可用时解析再快数倍。
+        # 读取持会话编辑锁: 已经起跑的落盘线程也持同一把锁,
+        # 保证重建读到的是其完成后的文件
+        with self.get_mutation_lock(session_db_obj.session_id):
+            with open(path, 'rb') as f:
+                raw = f.read()
+        content = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
         draft_root = os.path.dirname(path)
         instance = Script_file.from_dict(content, draft_root)
 
@@ -89,13 +138,35 @@ class ScriptFileManager:
             script_file_instance = self.cache.get(session_id)
             
             if script_file_instance is None:
-                # 缓存未命中，创建新实例
-                logger.info(f"缓存未命中，为会话 {session_id} 创建一个新的 Script_file 实例。")
-                script_file_instance = Script_file(
-                    width=session_db_obj.width,
-                    height=session_db_obj.height,
-                    fps=session_db_obj.fps
-                )
+                # 缓存未命中(首次访问或实例被LRU淘汰): 优先从磁盘上的草稿
+                # 完整重建, 避免已写盘的编辑在重启/淘汰后丢失; 草稿不存在或
+                # 损坏时回退到创建空实例
+                # 【关键修复】先冲刷该会话可能还在合并窗口内的待写落盘,
+                # 否则会基于旧文件重建, 待写任务稍后又用淘汰实例的状态
+                # 覆盖新文件, 双方的编辑互相丢失 (延迟导入避免循环依赖)
+                from app.api.v1.sessions import flush_session_dump
+                await flush_session_dump(session_id)
+
+                draft_path = path_manager.get_draft_content_path(session_id)
+                script_file_instance = None
+                if os.path.exists(draft_path):
+                    try:
+                        script_file_instance = await asyncio.to_thread(
+                            self._load_script_from_file, draft_path, session_db_obj)
+                    except Exception as e:
+                        logger.error(f"从 {draft_path} 重建 Script_file 失败, 将创建空实例: {e}")
+
+                if script_file_instance is None:
+                    logger.info(f"缓存未命中，为会话 {session_id} 创建一个新的 Script_file 实例。")
+                    script_file_instance = Script_file(
+                        width=session_db_obj.width,
+                        height=session_db_obj.height,
+                        fps=session_db_obj.fps
+                    )
+                # 【性能优化】加载时一次性缓存会话相关路径, 避免每个
+                # 端点在热路径上重复调用path_manager做字符串拼接
+                script_file_instance._session_dir = path_manager.get_session_dir(session_id)
+                script_file_instance._draft_path = draft_path
                 self.cache[session_id] = script_file_instance
             else:
                 logger.info(f"缓存命中，为会话 {session_id} 获取已存在的 Script_file 实例。")
@@ -116,23 +187,31 @@ class ScriptFileManager:
                         existing_material_ids.add(audio.material_id)
                     
                     # 只处理新增的素材，避免重复添加
-                    new_materials_count = 0
+                    # 【性能优化】先收集待分析的文件, 再用analyze_many并发探测:
+                    # N个新素材的ffprobe同时推进, 不再逐个await串行付fork+exec
+                    pending_materials = []
                     for material_db in materials:
                         if material_db.material_id in existing_material_ids:
                             continue  # 跳过已存在的素材
-                            
-                        try:
-                            logger.info(f"同步新素材: {material_db.material_id} ({material_db.jy_name})")
-                            
-                            # 检查本地文件是否存在 - 使用鲁棒的路径管理器
-                            # 数据库中存储的是相对路径，需要转换为绝对路径
-                            absolute_path = path_manager.normalize_path(material_db.local_path)
-                            if not os.path.exists(absolute_path):
-                                logger.warning(f"素材文件不存在: {absolute_path} (数据库路径: {material_db.local_path})")
-                                continue
 
-                            # 重新分析文件以获取元数据
-                            analysis_result = await media_analyzer.analyze(absolute_path)
+                        logger.info(f"同步新素材: {material_db.material_id} ({material_db.jy_name})")
+
+                        # 检查本地文件是否存在 - 使用鲁棒的路径管理器
+                        # 数据库中存储的是相对路径，需要转换为绝对路径
+                        absolute_path = path_manager.normalize_path(material_db.local_path)
+                        if not os.path.exists(absolute_path):
+                            logger.warning(f"素材文件不存在: {absolute_path} (数据库路径: {material_db.local_path})")
+                            continue
+                        pending_materials.append((material_db, absolute_path))
+
+                    # 重新分析文件以获取元数据 (并发, 失败的位置为None)
+                    analysis_results = await media_analyzer.analyze_many(
+                        [absolute_path for _, absolute_path in pending_materials])
+
+                    new_materials_count = 0
+                    for (material_db, absolute_path), analysis_result in zip(
+                            pending_materials, analysis_results):
+                        try:
                             if not analysis_result:
                                 logger.warning(f"无法分析素材文件: {material_db.local_path}")
                                 continue
@@ -192,8 +271,13 @@ class ScriptFileManager:
         """
         if session_id in self.cache:
             del self.cache[session_id]
-        if session_id in self.locks:
-            del self.locks[session_id]
+        shard_lock, locks = self._get_shard(session_id)
+        with shard_lock:
+            locks.pop(session_id, None)
+        mutation_shard_lock, mutation_locks = self._mutation_lock_shards[
+            hash(session_id) & (self._SHARD_COUNT - 1)]
+        with mutation_shard_lock:
+            mutation_locks.pop(session_id, None)
             
 # 创建一个全局可用的脚本文件管理器实例
 script_file_manager = ScriptFileManager() 
\ No newline at end of file
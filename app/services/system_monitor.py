@@ -116,7 +116,7 @@ class SystemMonitor:
             "is_running": self.is_running,
             "log_interval": self.log_interval,
             "start_time": getattr(self, 'start_time', None),
-            "current_metrics": performance_monitor.get_current_metrics().__dict__ if self.is_running else None
+            "current_metrics": performance_monitor.get_current_metrics()._asdict() if self.is_running else None
         }
 
 # 全局监控器实例 - 使用配置文件中的间隔
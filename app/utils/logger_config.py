@@ -1,48 +1,56 @@
 import logging
 import sys
-from datetime import datetime
+import time
 from typing import Optional
-import colorama
-from colorama import Fore, Style
 
-# 初始化colorama
-colorama.init()
+from app.config import settings
+
+# 【性能优化】colorama的价值在于Windows下包装stdout翻译ANSI转义,
+# Linux生产环境(彩色日志默认关闭)纯属每次write的额外一跳;
+# 只在启用彩色日志时才导入并初始化
+if settings.ENABLE_COLORED_LOGS:
+    import colorama
+    colorama.init()
 
 class ColoredFormatter(logging.Formatter):
     """带颜色和表情符号的日志格式化器"""
-    
-    # 日志级别对应的颜色和表情
+
+    # 日志级别对应的颜色和表情 (直接写ANSI转义码, 不依赖colorama.Fore)
     COLORS = {
-        'DEBUG': Fore.CYAN,
-        'INFO': Fore.GREEN, 
-        'WARNING': Fore.YELLOW,
-        'ERROR': Fore.RED,
-        'CRITICAL': Fore.MAGENTA
+        'DEBUG': "\x1b[36m",     # 青色
+        'INFO': "\x1b[32m",      # 绿色
+        'WARNING': "\x1b[33m",   # 黄色
+        'ERROR': "\x1b[31m",     # 红色
+        'CRITICAL': "\x1b[35m"   # 品红
     }
-    
+
+    RESET_ALL = "\x1b[0m"
+
     EMOJIS = {
         'DEBUG': '🔍',
-        'INFO': '✅', 
+        'INFO': '✅',
         'WARNING': '⚠️',
         'ERROR': '❌',
         'CRITICAL': '🚨'
     }
-    
+
+    # 【性能优化】颜色+表情前缀在类定义时拼好, format()只做一次字典查找
+    PREFIXES = {
+        level: f"{COLORS[level]}{EMOJIS[level]} " for level in COLORS
+    }
+
     def format(self, record):
-        # 获取颜色和表情
-        color = self.COLORS.get(record.levelname, '')
-        emoji = self.EMOJIS.get(record.levelname, '')
-        
-        # 格式化时间
-        timestamp = datetime.fromtimestamp(record.created).strftime('%H:%M:%S')
-        
+        prefix = self.PREFIXES.get(record.levelname, '')
+
+        # 格式化时间 (time.strftime比datetime.fromtimestamp().strftime()
+        # 少一次对象构造, 此方法在每条日志上执行)
+        timestamp = time.strftime('%H:%M:%S', time.localtime(record.created))
+
         # 构建日志消息
         message = super().format(record)
-        
+
         # 应用颜色和格式
-        formatted = f"{color}{emoji} {timestamp} [{record.levelname}] {message}{Style.RESET_ALL}"
-        
-        return formatted
+        return f"{prefix}{timestamp} [{record.levelname}] {message}{self.RESET_ALL}"
 
 class SystemResourceLogger:
     """系统资源监控日志器"""
@@ -161,33 +169,40 @@ class ApiLogger:
     
     def log_request_start(self, method: str, path: str, session_id: Optional[str] = None):
         """记录请求开始"""
-        session_info = f"[会话:{session_id[:8]}]" if session_id else ""
-        message = f"🚀 {method} {path} {session_info}"
-        self.logger.debug(message)
-    
+        # 【性能优化】级别被过滤时直接返回, 不做任何字符串拼接
+        # (生产LOG_LEVEL=WARNING, 每个请求都会走到这里)
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        # 【性能优化】模板+参数交给logging延迟格式化,
+        # %替换只在记录真正被handler发出时发生
+        self.logger.debug("🚀 %s %s %s", method, path,
+                          f"[会话:{session_id[:8]}]" if session_id else "")
+
     def log_request_success(self, method: str, path: str, duration: float, session_id: Optional[str] = None):
         """记录请求成功"""
-        session_info = f"[会话:{session_id[:8]}]" if session_id else ""
+        # 慢请求升级为WARNING, 按实际发出的级别判断是否需要构建消息
+        level = logging.WARNING if duration > 5.0 else logging.INFO
+        if not self.logger.isEnabledFor(level):
+            return
         duration_emoji = "⚡" if duration < 1.0 else "🐌" if duration > 5.0 else "✅"
-        message = f"{duration_emoji} {method} {path} {session_info} | 用时: {duration:.2f}s"
-        
-        if duration > 5.0:
-            self.logger.warning(message)
-        else:
-            self.logger.info(message)
-    
+        self.logger.log(level, "%s %s %s %s | 用时: %.2fs",
+                        duration_emoji, method, path,
+                        f"[会话:{session_id[:8]}]" if session_id else "", duration)
+
     def log_request_error(self, method: str, path: str, error: str, session_id: Optional[str] = None):
         """记录请求错误"""
-        session_info = f"[会话:{session_id[:8]}]" if session_id else ""
-        message = f"💥 {method} {path} {session_info} | 错误: {error}"
-        self.logger.error(message)
-    
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
+        self.logger.error("💥 %s %s %s | 错误: %s", method, path,
+                          f"[会话:{session_id[:8]}]" if session_id else "", error)
+
     def log_queue_wait(self, path: str, wait_time: float, session_id: Optional[str] = None):
         """记录排队等待"""
-        session_info = f"[会话:{session_id[:8]}]" if session_id else ""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         wait_emoji = "⏳" if wait_time < 10 else "⌛"
-        message = f"{wait_emoji} {path} {session_info} | 排队等待: {wait_time:.1f}s"
-        self.logger.info(message)
+        self.logger.info("%s %s %s | 排队等待: %.1fs", wait_emoji, path,
+                         f"[会话:{session_id[:8]}]" if session_id else "", wait_time)
 
 class SessionLogger:
     """会话操作日志器"""
@@ -197,36 +212,47 @@ class SessionLogger:
     
     def log_session_created(self, session_id: str, width: int, height: int):
         """记录会话创建"""
-        message = f"🎬 会话创建成功 | ID: {session_id[:8]} | 画布: {width}x{height}"
-        self.logger.info(message)
-    
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info("🎬 会话创建成功 | ID: %s | 画布: %sx%s",
+                         session_id[:8], width, height)
+
     def log_material_uploaded(self, session_id: str, material_type: str, file_size_mb: float):
         """记录素材上传"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         type_emoji = "🎥" if material_type == "video" else "🎵" if material_type == "audio" else "🖼️"
-        message = f"{type_emoji} 素材上传 | 会话: {session_id[:8]} | 类型: {material_type} | 大小: {file_size_mb:.1f}MB"
-        self.logger.info(message)
-    
+        self.logger.info("%s 素材上传 | 会话: %s | 类型: %s | 大小: %.1fMB",
+                         type_emoji, session_id[:8], material_type, file_size_mb)
+
     def log_track_added(self, session_id: str, track_type: str, track_name: str):
         """记录轨道添加"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         type_emoji = "🎬" if track_type == "video" else "🎵" if track_type == "audio" else "📝"
-        message = f"{type_emoji} 轨道添加 | 会话: {session_id[:8]} | 类型: {track_type} | 名称: {track_name}"
-        self.logger.info(message)
-    
+        self.logger.info("%s 轨道添加 | 会话: %s | 类型: %s | 名称: %s",
+                         type_emoji, session_id[:8], track_type, track_name)
+
     def log_segment_added(self, session_id: str, segment_type: str, duration: float):
         """记录片段添加"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         type_emoji = "🎞️" if segment_type == "video" else "🎶" if segment_type == "audio" else "📄"
-        message = f"{type_emoji} 片段添加 | 会话: {session_id[:8]} | 类型: {segment_type} | 时长: {duration:.1f}s"
-        self.logger.info(message)
-    
+        self.logger.info("%s 片段添加 | 会话: %s | 类型: %s | 时长: %.1fs",
+                         type_emoji, session_id[:8], segment_type, duration)
+
     def log_draft_saved(self, session_id: str, file_size_mb: float):
         """记录草稿保存"""
-        message = f"💾 草稿保存完成 | 会话: {session_id[:8]} | 大小: {file_size_mb:.1f}MB"
-        self.logger.info(message)
-    
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info("💾 草稿保存完成 | 会话: %s | 大小: %.1fMB",
+                         session_id[:8], file_size_mb)
+
     def log_session_cleaned(self, session_id: str, reason: str):
         """记录会话清理"""
-        message = f"🧹 会话清理 | ID: {session_id[:8]} | 原因: {reason}"
-        self.logger.info(message)
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info("🧹 会话清理 | ID: %s | 原因: %s", session_id[:8], reason)
 
 def setup_logging():
     """设置日志系统"""
@@ -236,7 +262,13 @@ def setup_logging():
     # 创建控制台处理器
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(ColoredFormatter())
+    # 【性能优化】生产环境(ENABLE_COLORED_LOGS=False)使用普通Formatter,
+    # 每条日志省掉颜色/表情拼接与ANSI转义
+    if settings.ENABLE_COLORED_LOGS:
+        console_handler.setFormatter(ColoredFormatter())
+    else:
+        console_handler.setFormatter(logging.Formatter(
+            "%(asctime)s [%(levelname)s] %(message)s", datefmt='%H:%M:%S'))
     
     # 设置各个日志器
     loggers = [
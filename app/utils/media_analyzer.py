@@ -1,11 +1,20 @@
 # 媒体分析器 (ffmpeg封装)
 import asyncio
+import functools
 import json
 import logging
 import os
 import platform
-import subprocess
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, List, Any
+
+from cachetools import LRUCache
+
+from app.utils.performance_monitor import available_cpu_count
+
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖, 缺失时回退到标准库json
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +23,7 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 FFPROBE_EXE_NAME = "ffprobe.exe" if platform.system() == "Windows" else "ffprobe"
 
 # 优先使用系统路径中的ffprobe（Docker容器中通过apt安装），降级到本地路径
+@functools.cache
 def get_ffprobe_path():
     import shutil
     # 首先尝试系统PATH中的ffprobe
@@ -23,6 +33,11 @@ def get_ffprobe_path():
     # 降级到项目本地路径
     return os.path.join(PROJECT_ROOT, 'ffmpeg', 'bin', FFPROBE_EXE_NAME)
 
+@functools.cache
+def _ffprobe_exists(path: str) -> bool:
+    """缓存可执行文件存在性检查, 每个路径只stat一次"""
+    return os.path.exists(path)
+
 FFPROBE_PATH = get_ffprobe_path()
 
 # --- MediaAnalysisResult Class ---
@@ -72,64 +87,126 @@ class MediaAnalysisResult:
 class MediaAnalyzer:
     def __init__(self, ffprobe_path: str = FFPROBE_PATH):
         self.ffprobe_path = ffprobe_path
-        if not os.path.exists(self.ffprobe_path):
+        if not _ffprobe_exists(self.ffprobe_path):
             raise FileNotFoundError(
                 f"ffprobe executable not found at the configured path: {self.ffprobe_path}. "
                 "Please ensure ffmpeg is correctly placed in the project root directory."
             )
-
-    def _analyze_sync(self, file_path: str) -> Dict[str, Any]:
+        # 【性能优化】分析结果缓存: (绝对路径, mtime_ns, 大小) -> ffprobe解析出的dict
+        # 文件内容变化会改变mtime/size使旧键自然失效; 存dict而非结果对象以保持条目小巧
+        self._cache: LRUCache = LRUCache(maxsize=1024)
+        # 按路径的single-flight锁: 同一文件的并发分析只跑一次ffprobe
+        self._inflight_locks: Dict[str, asyncio.Lock] = {}
+        # 限制并发的ffprobe进程数, 防止批量上传时fork风暴拖垮机器;
+        # 按可调度CPU数(容器中可能远小于os.cpu_count())确定上限
+        self._probe_semaphore = asyncio.Semaphore(available_cpu_count() * 2)
+
+    async def _run_ffprobe(self, file_path: str) -> Dict[str, Any]:
         """
-        A synchronous, blocking function that runs ffprobe.
-        This is designed to be executed in a thread pool to avoid blocking the server.
+        直接在事件循环上以异步子进程运行ffprobe。
+
+        相比subprocess.run + run_in_executor, 省去了线程池一跳,
+        大量并发探测可以全部由事件循环调度。
         """
         normalized_path = file_path.replace('\\', '/')
-        command = [
-            self.ffprobe_path,
-            '-v', 'error',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            normalized_path
-        ]
-        
 
         try:
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=True,
-                encoding='utf-8'
-            )
-            
-            if not result.stdout.strip():
-                 raise ValueError("ffprobe returned empty output, the file may be invalid.")
-            
-            return json.loads(result.stdout)
-
-        except subprocess.CalledProcessError as e:
-            error_message = e.stderr.strip()
-            raise RuntimeError(f"ffprobe failed: {error_message}") from e
-        except json.JSONDecodeError as e:
+            async with self._probe_semaphore:
+                # 【性能优化】只取用到的字段: 完整的-show_format -show_streams
+                # 输出可达数十KB, 裁剪后通常不足500字节, JSON解析量随之缩减
+                process = await asyncio.create_subprocess_exec(
+                    self.ffprobe_path,
+                    '-v', 'error',
+                    '-print_format', 'json',
+                    '-show_entries',
+                    'format=duration:stream=codec_type,width,height,avg_frame_rate,sample_rate',
+                    normalized_path,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                stdout, stderr = await process.communicate()
+
+            if process.returncode != 0:
+                raise RuntimeError(f"ffprobe failed: {stderr.decode('utf-8', 'replace').strip()}")
+
+            if not stdout.strip():
+                raise ValueError("ffprobe returned empty output, the file may be invalid.")
+
+            # ffprobe的JSON输出可达数十KB, orjson直接解析bytes且速度数倍于标准库
+            if orjson is not None:
+                return orjson.loads(stdout)
+            return json.loads(stdout)
+
+        except RuntimeError:
+            raise
+        except Exception:
+            # 与旧实现保持一致: 解析失败/空输出等情况返回None而非抛出
             return None
-        except Exception as e:
+
+    def _cache_key(self, file_path: str):
+        """以(绝对路径, mtime_ns, 大小)为键; 文件不可stat时返回None表示不缓存"""
+        try:
+            stat = os.stat(file_path)
+            return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        except OSError:
             return None
 
     async def analyze(self, file_path: str) -> Optional[MediaAnalysisResult]:
         """
         Asynchronously analyzes a media file by running the synchronous
         _analyze_sync method in a separate thread.
+
+        重复分析同一文件(草稿重开/片段复用时很常见)直接命中缓存,
+        完全省掉ffprobe的fork+exec与JSON解析。
         """
-        loop = asyncio.get_running_loop()
+        cache_key = self._cache_key(file_path)
+        if cache_key is not None:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return MediaAnalysisResult(cached)
+
+        lock = self._inflight_locks.setdefault(file_path, asyncio.Lock())
         try:
-            parsed_analysis = await loop.run_in_executor(
-                None, self._analyze_sync, file_path
-            )
-            return MediaAnalysisResult(parsed_analysis)
-        except Exception as e:
-            logger.error(f"Error during scheduled media analysis for {file_path}: {e}")
-            raise
+            async with lock:
+                # 等锁期间可能已有并发请求完成了分析
+                if cache_key is not None:
+                    cached = self._cache.get(cache_key)
+                    if cached is not None:
+                        return MediaAnalysisResult(cached)
+
+                try:
+                    parsed_analysis = await self._run_ffprobe(file_path)
+                except Exception as e:
+                    logger.error(f"Error during scheduled media analysis for {file_path}: {e}")
+                    raise
+
+                if cache_key is not None and parsed_analysis is not None:
+                    self._cache[cache_key] = parsed_analysis
+                return MediaAnalysisResult(parsed_analysis)
+        finally:
+            self._inflight_locks.pop(file_path, None)
+
+    async def analyze_many(self, paths: List[str]) -> List[Optional[MediaAnalysisResult]]:
+        """
+        并发分析多个媒体文件, 按输入顺序返回结果。
+
+        批量上传场景下逐个await analyze()会把fork+exec串行化;
+        gather让所有探测同时在事件循环上推进, 实际的ffprobe进程数
+        仍由_probe_semaphore限制, 重复路径由single-flight锁去重。
+        单个文件分析失败不影响其他文件, 失败位置返回None。
+        """
+        if not paths:
+            return []
+        results = await asyncio.gather(*(self.analyze(p) for p in paths),
+                                       return_exceptions=True)
+        analyses: List[Optional[MediaAnalysisResult]] = []
+        for path, result in zip(paths, results):
+            if isinstance(result, BaseException):
+                logger.error("批量分析素材 %s 失败: %s", path, result)
+                analyses.append(None)
+            else:
+                analyses.append(result)
+        return analyses
 
 # Global instance
 media_analyzer = MediaAnalyzer() 
\ No newline at end of file
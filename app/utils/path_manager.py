@@ -24,6 +24,10 @@ class PathManager:
         self._output_dir = None
         self._dir_creation_lock = threading.Lock()
         self._created_dirs = set()
+        # 【性能优化】会话路径缓存: session_id -> (会话目录, 草稿文件路径)
+        # 路径拼接本身很便宜, 昂贵的是get_session_dir每次调用都要走_safe_makedirs,
+        # 命中缓存即说明目录已创建, 可以完全跳过
+        self._session_path_cache: dict = {}
         self._detect_environment()
     
     def _detect_environment(self):
@@ -147,8 +151,13 @@ class PathManager:
     
     def get_session_dir(self, session_id: str) -> str:
         """获取特定会话的目录绝对路径"""
+        cached = self._session_path_cache.get(session_id)
+        if cached is not None:
+            return cached[0]
         session_dir = os.path.join(self._output_dir, session_id)
         self._safe_makedirs(session_dir)
+        self._session_path_cache[session_id] = (
+            session_dir, os.path.join(session_dir, "draft_content.json"))
         return session_dir
     
     def get_session_resources_dir(self, session_id: str) -> str:
@@ -163,6 +172,9 @@ class PathManager:
     
     def get_draft_content_path(self, session_id: str) -> str:
         """获取草稿内容文件的绝对路径"""
+        cached = self._session_path_cache.get(session_id)
+        if cached is not None:
+            return cached[1]
         return os.path.join(self.get_session_dir(session_id), "draft_content.json")
     
     def get_zips_dir(self) -> str:
@@ -1,10 +1,23 @@
+import collections
+import os
+import time
 import psutil
-from typing import List
-from dataclasses import dataclass
 from datetime import datetime
+from typing import NamedTuple
 
-@dataclass
-class PerformanceMetrics:
+def available_cpu_count() -> int:
+    """返回进程实际可调度的CPU数。
+
+    容器环境(如HuggingFace Spaces)里psutil.cpu_count()报告的是宿主机
+    核数, 可能远大于cgroup实际分配的; Linux下用调度亲和性取真实值。
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return psutil.cpu_count() or 1
+
+# 【性能优化】NamedTuple实例是C级tuple, 没有每实例__dict__,
+# 监控周期与各调用点频繁创建时比普通dataclass更省内存且属性访问更快
+class PerformanceMetrics(NamedTuple):
     cpu_percent: float
     memory_percent: float
     memory_available_mb: float
@@ -12,15 +25,35 @@ class PerformanceMetrics:
     active_tasks: int
     avg_response_time: float
     timestamp: datetime
+    # 可调度CPU数, 供消费方换算负载比例; 带默认值保持既有构造点兼容
+    cpu_count: int = 0
 
 class PerformanceMonitor:
     def __init__(self):
-        self.response_times: List[float] = []
         self.max_response_time_samples = 50
+        # 【性能优化】deque自动淘汰最老样本(list.pop(0)是O(n)),
+        # 配合运行总和使平均值计算为O(1), 不再每次遍历全部样本
+        self.response_times = collections.deque(maxlen=self.max_response_time_samples)
+        self._response_sum = 0.0
         self.active_tasks = 0
+        # 【性能优化】指标快照缓存: psutil每次采样都要读/proc,
+        # 监控循环与每个请求都会取指标, 1秒内复用同一份快照
+        self._metrics_cache_ts = 0.0
+        self._metrics_cache = None
+        self._metrics_cache_ttl = 1.0
+        # 磁盘占用变化远慢于CPU/内存, 单独用更长的TTL缓存statvfs结果
+        self._disk_cache_ts = 0.0
+        self._disk_usage_percent = 0.0
+        self._disk_cache_ttl = 30.0
+        # 启动时取一次可调度CPU数, 运行期不变
+        self._cpu_count = available_cpu_count()
         
     def get_current_metrics(self) -> PerformanceMetrics:
-        """获取当前系统性能指标"""
+        """获取当前系统性能指标 (1秒内返回缓存的快照)"""
+        now = time.monotonic()
+        if self._metrics_cache is not None and now - self._metrics_cache_ts < self._metrics_cache_ttl:
+            return self._metrics_cache
+
         # 初始化默认�?
         cpu_percent = 0.0
         memory_percent = 0.0
@@ -45,20 +78,22 @@ class PerformanceMonitor:
             memory_available_mb = 0.0
             
         try:
-            # 磁盘使用�?
-            import os
-            if os.name == 'nt':
-                disk = psutil.disk_usage('C:')
-            else:
-                disk = psutil.disk_usage('/')
-            disk_usage_percent = disk.percent
-            
+            # 磁盘使用�?(30秒TTL, 避免每次采样都statvfs)
+            if now - self._disk_cache_ts >= self._disk_cache_ttl:
+                if os.name == 'nt':
+                    disk = psutil.disk_usage('C:')
+                else:
+                    disk = psutil.disk_usage('/')
+                self._disk_usage_percent = disk.percent
+                self._disk_cache_ts = now
+            disk_usage_percent = self._disk_usage_percent
+
         except Exception as disk_error:
             disk_usage_percent = 0.0
         
-        # 响应时间
+        # 响应时间 (运行总和, O(1))
         try:
-            avg_response_time = sum(self.response_times) / len(self.response_times) if self.response_times else 0.0
+            avg_response_time = self._response_sum / len(self.response_times) if self.response_times else 0.0
         except:
             avg_response_time = 0.0
             
@@ -68,22 +103,27 @@ class PerformanceMonitor:
         except:
             active_tasks = 0
             
-        return PerformanceMetrics(
+        metrics = PerformanceMetrics(
             cpu_percent=cpu_percent,
             memory_percent=memory_percent,
             memory_available_mb=memory_available_mb,
             disk_usage_percent=disk_usage_percent,
             active_tasks=active_tasks,
             avg_response_time=avg_response_time,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            cpu_count=self._cpu_count
         )
+        self._metrics_cache = metrics
+        self._metrics_cache_ts = now
+        return metrics
     
     def record_response_time(self, response_time: float):
         """记录API响应时间"""
+        # deque已满时append会挤掉最老的样本, 先从总和中扣除
+        if len(self.response_times) == self.max_response_time_samples:
+            self._response_sum -= self.response_times[0]
         self.response_times.append(response_time)
-        # 保持固定数量的样�?
-        if len(self.response_times) > self.max_response_time_samples:
-            self.response_times.pop(0)
+        self._response_sum += response_time
     
     def increment_active_tasks(self):
         """增加活跃任务计数"""